@@ -0,0 +1,230 @@
+"""
+Parallel hyperparameter search for the mlp.MLP network of Ann_project2.ipynb
+
+Configurations (eta, lmbda, hidden layer sizes, batch size) are trained in
+worker processes with successive halving: every configuration trains for
+a few epochs, only the best 1/factor by validation loss continue, their
+budget is multiplied by factor, and so on until one rung is left. The
+survivors resume from the parameters they reached, so no epoch is
+trained twice.
+
+The training and validation matrices are copied once into shared memory
+and every worker maps them. Workers are started with the "spawn" method
+and BLAS limited to blas_threads threads each, so that n workers do not
+start n full-size BLAS thread pools. Loss curves of every configuration
+are written by write_results().
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from mlp import MLP
+
+try:
+    from shared_arrays import attach, shared_arrays
+except ImportError:
+    # Run from this directory (next to the notebook); the helper lives one level up
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from shared_arrays import attach, shared_arrays
+
+# Environment variables read by the common BLAS builds when NumPy is imported
+BLAS_THREAD_VARIABLES = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                         "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+DEFAULT_GRID = {
+    "eta": (0.01, 0.05, 0.1),
+    "lmbda": (0.0, 0.1, 1.0),
+    "hidden": ((16, 64, 64, 16), (32, 32), (64, 64, 64)),
+    "batch_size": (None, 256),
+}
+
+# Arrays attached by each worker in _init_worker
+_shared = {}
+
+
+def grid(**values):
+    """Every combination of the given values (DEFAULT_GRID for missing keys) as config dicts"""
+    values = {**DEFAULT_GRID, **values}
+    keys = list(values)
+    return [dict(zip(keys, combination)) for combination in itertools.product(*values.values())]
+
+
+def _init_worker(specs):
+    """Pool initializer: map the shared arrays"""
+    _shared.update(attach(specs))
+
+
+def _train(task):
+    """Train one configuration for `epochs` more epochs; returns its new state and curves"""
+    config_id, config, parameters, epochs, seed, output = task
+    x_train, y_train = _shared["x_train"], _shared["y_train"]
+    sizes = [x_train.shape[0], *config["hidden"], y_train.shape[0]]
+    if parameters is None:
+        model = MLP(sizes, output=output, lmbda=config["lmbda"], seed=seed)
+    else:
+        model = MLP.from_parameters(parameters, output=output, lmbda=config["lmbda"])
+
+    val_losses = []
+
+    def validate(model, epoch, loss):
+        val_losses.append(model.loss(_shared["x_val"], _shared["y_val"]))
+        # A diverged configuration cannot recover; stop spending epochs on it
+        return not np.isfinite(loss)
+
+    start = time.perf_counter()
+    train_losses = model.fit(x_train, y_train, epochs=epochs, eta=config["eta"],
+                             batch_size=config["batch_size"], seed=seed, callback=validate)
+    return config_id, model.parameters(), train_losses, val_losses, time.perf_counter() - start
+
+
+def _score(curve):
+    """Last validation loss, with diverged runs ranked last"""
+    return curve[-1] if curve and np.isfinite(curve[-1]) else np.inf
+
+
+def successive_halving(x_train, y_train, x_val, y_val, configs=None, min_epochs=10, factor=3,
+                       max_epochs=270, workers=None, blas_threads=1, output="relu", seed=0, verbose=True):
+    """
+    Returns one dict per configuration: its config, the epochs it trained,
+    the rung it reached, its train/validation loss curves (one value per
+    epoch) and final parameters for the configurations still alive at the
+    last rung. Arrays are (features, samples) as in the notebook.
+    """
+    configs = grid() if configs is None else configs
+    results = [{"id": i, "config": config, "epochs": 0, "rung": 0, "train_loss": [], "val_loss": [],
+                "seconds": 0.0, "parameters": None} for i, config in enumerate(configs)]
+    arrays = {"x_train": np.asarray(x_train, dtype=np.float32), "y_train": np.asarray(y_train, dtype=np.float32),
+              "x_val": np.asarray(x_val, dtype=np.float32), "y_val": np.asarray(y_val, dtype=np.float32)}
+
+    saved = {name: os.environ.get(name) for name in BLAS_THREAD_VARIABLES}
+    try:
+        # Spawned workers import NumPy afresh and so read the thread limits
+        os.environ.update({name: str(blas_threads) for name in BLAS_THREAD_VARIABLES})
+        context = multiprocessing.get_context("spawn")
+        with shared_arrays(arrays) as specs, context.Pool(workers, initializer=_init_worker,
+                                                          initargs=(specs,)) as pool:
+            alive = list(range(len(results)))
+            budget, rung = min_epochs, 0
+            while alive:
+                epochs = budget - results[alive[0]]["epochs"]
+                tasks = [(i, results[i]["config"], results[i]["parameters"], epochs,
+                          seed + 1000 * rung + i, output) for i in alive]
+                for config_id, parameters, train_losses, val_losses, seconds in pool.imap_unordered(_train, tasks):
+                    result = results[config_id]
+                    result["parameters"] = parameters
+                    result["train_loss"] += train_losses
+                    result["val_loss"] += val_losses
+                    result["epochs"] = budget
+                    result["rung"] = rung
+                    result["seconds"] += seconds
+                if verbose:
+                    best = min(alive, key=lambda i: _score(results[i]["val_loss"]))
+                    print(f"Rung {rung}: {len(alive)} configurations at {budget} epochs, "
+                          f"best validation loss {_score(results[best]['val_loss']):.5f} ({results[best]['config']})")
+
+                if len(alive) <= 1 or budget >= max_epochs:
+                    break
+                alive.sort(key=lambda i: _score(results[i]["val_loss"]))
+                # Dropped configurations do not need their parameters any more
+                for i in alive[max(1, len(alive) // factor):]:
+                    results[i]["parameters"] = None
+                alive = sorted(alive[:max(1, len(alive) // factor)])
+                budget, rung = min(budget * factor, max_epochs), rung + 1
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    return results
+
+
+def best(results):
+    top_rung = max(result["rung"] for result in results)
+    return min((result for result in results if result["rung"] == top_rung),
+               key=lambda result: _score(result["val_loss"]))
+
+
+def write_results(results, prefix):
+    """
+    prefix.csv: one summary row per configuration. prefix.npz: the loss
+    curves, as train_<id> and val_<id> arrays.
+    """
+    with open(prefix + ".csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "eta", "lmbda", "hidden", "batch_size", "rung", "epochs",
+                         "final_train_loss", "final_val_loss", "seconds"])
+        for result in results:
+            config = result["config"]
+            writer.writerow([result["id"], config["eta"], config["lmbda"], json.dumps(list(config["hidden"])),
+                             config["batch_size"], result["rung"], result["epochs"],
+                             result["train_loss"][-1] if result["train_loss"] else "",
+                             result["val_loss"][-1] if result["val_loss"] else "", f"{result['seconds']:.3f}"])
+    curves = {}
+    for result in results:
+        curves[f"train_{result['id']}"] = np.array(result["train_loss"])
+        curves[f"val_{result['id']}"] = np.array(result["val_loss"])
+    np.savez_compressed(prefix + ".npz", **curves)
+
+
+def plot_curves(results, top=10):
+    """Validation loss curves of the `top` best configurations"""
+    import matplotlib.pyplot as plt
+
+    ranked = sorted(results, key=lambda result: (-result["rung"], _score(result["val_loss"])))
+    plt.figure(figsize=(10, 6))
+    for result in ranked[:top]:
+        config = result["config"]
+        plt.plot(result["val_loss"], label=f"eta={config['eta']}, lmbda={config['lmbda']}, "
+                                           f"hidden={config['hidden']}, batch={config['batch_size']}")
+    plt.yscale('log')
+    plt.xlabel('Epoch')
+    plt.ylabel('Validation loss')
+    plt.title('Successive halving')
+    plt.legend(fontsize=7)
+    plt.show()
+
+
+if __name__ == "__main__":
+    from housing_data import load_housing
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--train", default="housing_data.csv")
+    parser.add_argument("--test", default="california_housing_test.csv")
+    parser.add_argument("--min-epochs", type=int, default=10)
+    parser.add_argument("--max-epochs", type=int, default=270)
+    parser.add_argument("--factor", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--blas-threads", type=int, default=1)
+    parser.add_argument("--validation", type=float, default=0.2, help="share of the training file held out")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--prefix", default="ann_sweep")
+    args = parser.parse_args()
+
+    x, y, x_test, y_test, _ = load_housing(args.train, args.test)
+    order = np.random.default_rng(args.seed).permutation(x.shape[1])
+    n_val = int(len(order) * args.validation)
+    val, train = np.sort(order[:n_val]), np.sort(order[n_val:])
+
+    start = time.perf_counter()
+    results = successive_halving(x[:, train], y[:, train], x[:, val], y[:, val], min_epochs=args.min_epochs,
+                                 factor=args.factor, max_epochs=args.max_epochs, workers=args.workers,
+                                 blas_threads=args.blas_threads, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    write_results(results, args.prefix)
+
+    winner = best(results)
+    model = MLP.from_parameters(winner["parameters"], lmbda=winner["config"]["lmbda"])
+    test_mse = float(np.mean((model.predict(x_test) - y_test) ** 2))
+    total_epochs = sum(result["epochs"] for result in results)
+    print(f"Best: {winner['config']} - validation loss {winner['val_loss'][-1]:.5f}, test MSE {test_mse:.5f}")
+    print(f"{len(results)} configurations, {total_epochs} epochs in {elapsed:.1f}s "
+          f"({len(results) * args.max_epochs} epochs without halving); curves in {args.prefix}.csv/.npz")
@@ -0,0 +1,213 @@
+"""
+Cached, memory-mapped loading of the housing CSVs for Ann_project2.ipynb
+
+A CSV is parsed once, in chunks, into a float32 .npy file laid out as
+(columns, rows), the (features, samples) layout feed_forward expects. The
+same pass collects every column's minimum, maximum and NaN count, which
+are written next to it as JSON. Both files are named after a hash of the
+CSV's contents, so an edited CSV is converted again and an unchanged one
+is opened with np.load(mmap_mode="r") in milliseconds.
+
+Min-max scaling (MinMaxScaler with the default (0, 1) range) is applied
+block by block from those statistics, either into a second cached .npy
+or on the fly while serving mini-batches. Neither path ever needs the
+whole data set in memory.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = ".housing_cache"
+BLOCK_ROWS = 65536
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """Short SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def count_rows(path, chunk_size=1 << 20):
+    """Data rows of a CSV with a header line (the file must not end in blank lines)"""
+    lines, last = 0, b"\n"
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    if last != b"\n":
+        lines += 1
+    return lines - 1
+
+
+class MinMaxScaling:
+    """MinMaxScaler's (0, 1) transform from known per-column minima and maxima"""
+
+    def __init__(self, minimum, maximum):
+        self.minimum = np.asarray(minimum, dtype=np.float32)
+        data_range = np.asarray(maximum, dtype=np.float32) - self.minimum
+        # Constant columns are left unscaled, as sklearn does
+        self.scale = np.where(data_range == 0, 1, 1 / data_range).astype(np.float32)
+
+    def transform(self, block, out=None):
+        """Scale a (columns, samples) block; out may be block itself"""
+        out = np.subtract(block, self.minimum[:, None], out=out)
+        out *= self.scale[:, None]
+        return out
+
+    def inverse_transform(self, block):
+        return block / self.scale[:, None] + self.minimum[:, None]
+
+    def key(self):
+        return hashlib.sha256(self.minimum.tobytes() + self.scale.tobytes()).hexdigest()[:16]
+
+
+class CachedCSV:
+    """A CSV converted to a (columns, rows) float32 memory map, with column statistics"""
+
+    def __init__(self, path, cache_dir=None, block_rows=BLOCK_ROWS):
+        self.path = path
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+        self.block_rows = block_rows
+        stem = os.path.splitext(os.path.basename(path))[0]
+        self.prefix = os.path.join(self.cache_dir, f"{stem}-{file_hash(path)}")
+
+        if not (os.path.exists(self.prefix + ".npy") and os.path.exists(self.prefix + ".json")):
+            self._convert()
+        with open(self.prefix + ".json") as f:
+            meta = json.load(f)
+        self.columns = meta["columns"]
+        self.minimum = np.array(meta["minimum"], dtype=np.float64)
+        self.maximum = np.array(meta["maximum"], dtype=np.float64)
+        self.nan_count = np.array(meta["nan_count"], dtype=np.int64)
+        self.data = np.load(self.prefix + ".npy", mmap_mode="r")
+
+    def _convert(self):
+        """One chunked pass over the CSV: write the .npy and collect the statistics"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        n_rows = count_rows(self.path)
+        columns = list(pd.read_csv(self.path, nrows=0).columns)
+        # Written under temporary names so an interrupted conversion is never picked up
+        tmp_npy, tmp_json = self.prefix + ".tmp.npy", self.prefix + ".tmp.json"
+        data = np.lib.format.open_memmap(tmp_npy, mode="w+", dtype=np.float32, shape=(len(columns), n_rows))
+        minimum = np.full(len(columns), np.inf)
+        maximum = np.full(len(columns), -np.inf)
+        nan_count = np.zeros(len(columns), dtype=np.int64)
+
+        start = 0
+        for chunk in pd.read_csv(self.path, chunksize=self.block_rows, dtype=np.float64):
+            values = chunk.to_numpy()
+            data[:, start:start + len(values)] = values.T
+            start += len(values)
+            nan_count += np.isnan(values).sum(axis=0)
+            # All-NaN chunks of a column would warn and give NaN
+            with np.errstate(invalid="ignore"):
+                minimum = np.fmin(minimum, np.nanmin(values, axis=0, initial=np.inf))
+                maximum = np.fmax(maximum, np.nanmax(values, axis=0, initial=-np.inf))
+        if start != n_rows:
+            raise ValueError(f"{self.path}: counted {n_rows} rows but parsed {start}")
+        data.flush()
+        del data
+
+        with open(tmp_json, "w") as f:
+            json.dump({"source": os.path.abspath(self.path), "columns": columns, "rows": n_rows,
+                       "minimum": minimum.tolist(), "maximum": maximum.tolist(),
+                       "nan_count": nan_count.tolist()}, f, indent=1)
+        os.replace(tmp_npy, self.prefix + ".npy")
+        os.replace(tmp_json, self.prefix + ".json")
+
+    @property
+    def n_rows(self):
+        return self.data.shape[1]
+
+    def column_index(self, columns):
+        return [self.columns.index(name) for name in columns]
+
+    def complete_columns(self):
+        """Columns without missing values, i.e. what df.dropna(axis=1) keeps"""
+        return [name for name, nans in zip(self.columns, self.nan_count) if nans == 0]
+
+    def scaler(self, columns):
+        """MinMaxScaling fitted on these columns, like MinMaxScaler().fit(df[columns])"""
+        index = self.column_index(columns)
+        return MinMaxScaling(self.minimum[index], self.maximum[index])
+
+    def scaled(self, columns, scaler):
+        """
+        (len(columns), rows) float32 memory map of the scaled columns, cached
+        under the CSV's hash and the scaler's statistics
+        """
+        index = self.column_index(columns)
+        key = hashlib.sha256(",".join(map(str, index)).encode() + scaler.key().encode()).hexdigest()[:16]
+        path = f"{self.prefix}-scaled-{key}.npy"
+        if not os.path.exists(path):
+            tmp = path[:-4] + ".tmp.npy"
+            out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(len(index), self.n_rows))
+            for start in range(0, self.n_rows, self.block_rows):
+                block = out[:, start:start + self.block_rows]
+                block[...] = self.data[index, start:start + self.block_rows]
+                scaler.transform(block, out=block)
+            out.flush()
+            del out
+            os.replace(tmp, path)
+        return np.load(path, mmap_mode="r")
+
+    def batches(self, features, target, batch_size, scaler=None, target_scaler=None, shuffle=True, seed=None):
+        """
+        Yield (x, y) mini-batches, (features, batch) and (1, batch) float32,
+        read from the memory map and scaled on the fly. Shuffling permutes
+        the order of blocks of block_rows samples and the samples within
+        each block, so reads stay sequential on disk.
+        """
+        rng = np.random.default_rng(seed)
+        feature_index, target_index = self.column_index(features), self.column_index([target])
+        starts = np.arange(0, self.n_rows, self.block_rows)
+        if shuffle:
+            rng.shuffle(starts)
+        for start in starts:
+            x_block = np.array(self.data[feature_index, start:start + self.block_rows])
+            y_block = np.array(self.data[target_index, start:start + self.block_rows])
+            if scaler is not None:
+                scaler.transform(x_block, out=x_block)
+            if target_scaler is not None:
+                target_scaler.transform(y_block, out=y_block)
+            order = rng.permutation(x_block.shape[1]) if shuffle else np.arange(x_block.shape[1])
+            for batch_start in range(0, len(order), batch_size):
+                index = order[batch_start:batch_start + batch_size]
+                yield x_block[:, index], y_block[:, index]
+
+
+def load_housing(train_path="housing_data.csv", test_path="california_housing_test.csv",
+                 target="median_house_value", cache_dir=None):
+    """
+    The notebook's scaled arrays as cached memory maps:
+    (x_train, y_train, x_test, y_test, columns), the x arrays of shape
+    (features, samples) and the y arrays of shape (1, samples). As in the
+    notebook, columns with missing values are dropped, the scaler is fitted
+    on every remaining training column (target included) and the test set
+    is scaled with the training statistics.
+    """
+    train = CachedCSV(train_path, cache_dir)
+    test = CachedCSV(test_path, cache_dir)
+    columns = train.complete_columns()
+    features = [name for name in columns if name != target]
+
+    scaler = train.scaler(columns)
+    train_scaled = train.scaled(columns, scaler)
+    test_scaled = test.scaled(columns, scaler)
+    target_row = columns.index(target)
+    feature_rows = [columns.index(name) for name in features]
+    # Row slices of a memory map are still memory maps; fancy indexing would copy
+    if feature_rows == list(range(len(features))) and target_row == len(features):
+        x_train, y_train = train_scaled[:len(features)], train_scaled[target_row:target_row + 1]
+        x_test, y_test = test_scaled[:len(features)], test_scaled[target_row:target_row + 1]
+    else:
+        x_train, y_train = train_scaled[feature_rows], train_scaled[[target_row]]
+        x_test, y_test = test_scaled[feature_rows], test_scaled[[target_row]]
+    return x_train, y_train, x_test, y_test, features
@@ -0,0 +1,228 @@
+"""
+N-layer fully connected network for Ann_project2.ipynb
+
+Same model as the notebook's five-layer network, for any list of layer
+sizes: data is laid out as (features, samples), weights as (out, in) and
+biases as (out, 1), hidden layers use ReLU, and the loss is the notebook's
+1/(2m) * sum of squares plus lmbda/(2m) * sum of squared weights. The
+output layer is ReLU (as in the housing regression), linear, or softmax
+with cross-entropy (as in the MNIST section).
+
+Parameters and every per-batch array (inputs, activations, deltas,
+gradients) are allocated once per batch size in `dtype` (float32 by
+default), and the forward and backward passes write into them with out=.
+Mini-batches are gathered from a permutation of column indices with
+np.take into the input buffer, so the training set itself is never copied.
+Without an optimizer the update is the notebook's plain gradient step,
+fused into the backward pass; any optimizers.Optimizer can be passed
+instead.
+"""
+
+import numpy as np
+
+OUTPUTS = ("relu", "linear", "softmax")
+
+
+class MLP:
+    def __init__(self, layer_sizes, output="relu", lmbda=0.1, init="uniform", dtype=np.float32, seed=None):
+        """
+        layer_sizes: [inputs, hidden..., outputs]. init="uniform" draws the
+        notebook's weights in [0, 0.1); init="he" uses He initialisation as
+        in the MNIST section. Biases start at zero.
+        """
+        if output not in OUTPUTS:
+            raise ValueError(f"Unknown output activation: {output}")
+        if len(layer_sizes) < 2:
+            raise ValueError("At least an input and an output layer are needed")
+        self.layer_sizes = list(layer_sizes)
+        self.output = output
+        self.lmbda = lmbda
+        self.dtype = np.dtype(dtype)
+        rng = np.random.default_rng(seed)
+
+        self.weights, self.biases = [], []
+        for n_in, n_out in zip(self.layer_sizes[:-1], self.layer_sizes[1:]):
+            if init == "uniform":
+                W = rng.random((n_out, n_in)) * 0.1
+            elif init == "he":
+                W = rng.standard_normal((n_out, n_in)) * np.sqrt(2.0 / n_in)
+            else:
+                raise ValueError(f"Unknown init: {init}")
+            self.weights.append(W.astype(self.dtype))
+            self.biases.append(np.zeros((n_out, 1), dtype=self.dtype))
+        self._buffers = {}
+
+    @classmethod
+    def from_parameters(cls, parameters, **kwargs):
+        """Build from the notebook's [W1, b1, W2, b2, ...] list (the arrays are copied)"""
+        weights = parameters[0::2]
+        model = cls([weights[0].shape[1]] + [W.shape[0] for W in weights], **kwargs)
+        model.weights = [np.array(W, dtype=model.dtype) for W in weights]
+        model.biases = [np.array(b, dtype=model.dtype).reshape(-1, 1) for b in parameters[1::2]]
+        return model
+
+    def parameters(self):
+        """Parameters in the notebook's [W1, b1, W2, b2, ...] order"""
+        return [array for pair in zip(self.weights, self.biases) for array in pair]
+
+    @property
+    def n_layers(self):
+        return len(self.weights)
+
+    def _batch_buffers(self, size, gather=False, cache=True):
+        """
+        Arrays for a batch of `size` samples, allocated on first use. With
+        gather, also x/y arrays to copy a shuffled batch into (a full batch
+        is used in place). Only fit() caches them: its batch size and the
+        last, smaller batch.
+        """
+        buffers = self._buffers.get(size)
+        if buffers is None:
+            sizes = self.layer_sizes
+            buffers = {
+                # Post-activation outputs; ReLU's derivative is read back from a > 0
+                "a": [np.empty((n, size), self.dtype) for n in sizes[1:]],
+                # delta[h] is dL/dz of layer h, scratch[h] holds dL/da before masking
+                "delta": [np.empty((n, size), self.dtype) for n in sizes[1:]],
+                "scratch": [np.empty((n, size), self.dtype) for n in sizes[1:]],
+                "mask": [np.empty((n, size), bool) for n in sizes[1:]],
+                "dW": [np.empty_like(W) for W in self.weights],
+                "db": [np.empty(len(b), self.dtype) for b in self.biases],
+            }
+            if cache:
+                self._buffers[size] = buffers
+        if gather and "x" not in buffers:
+            buffers["x"] = np.empty((self.layer_sizes[0], size), self.dtype)
+            buffers["y"] = np.empty((self.layer_sizes[-1], size), self.dtype)
+        return buffers
+
+    def _forward(self, x, buffers):
+        """Forward pass of x into buffers["a"]; returns the output activations"""
+        last = self.n_layers - 1
+        inputs = x
+        for h, (W, b, a) in enumerate(zip(self.weights, self.biases, buffers["a"])):
+            np.matmul(W, inputs, out=a)
+            a += b
+            if h < last or self.output == "relu":
+                np.maximum(a, 0, out=a)
+            elif self.output == "softmax":
+                a -= a.max(axis=0, keepdims=True)
+                np.exp(a, out=a)
+                a /= a.sum(axis=0, keepdims=True)
+            inputs = a
+        return inputs
+
+    def _loss(self, y_out, y, m):
+        if self.output == "softmax":
+            return -float(np.sum(y * np.log(np.clip(y_out, 1e-10, 1.0)))) / m
+        diff = y_out - y
+        return float(np.vdot(diff, diff)) / (2 * m)
+
+    def regularization(self, m):
+        """The notebook's lmbda/(2m) * sum of squared weights"""
+        return self.lmbda / (2 * m) * sum(float(np.vdot(W, W)) for W in self.weights)
+
+    def _step(self, x, y, eta, buffers, optimizer=None):
+        """One gradient step on the batch in x/y; returns its loss before the update"""
+        m = x.shape[1]
+        a, delta, scratch, mask = buffers["a"], buffers["delta"], buffers["scratch"], buffers["mask"]
+        y_out = self._forward(x, buffers)
+
+        # Output delta: dL/da = a - y, masked by ReLU's derivative for a ReLU output
+        # (softmax with cross-entropy also gives a - y)
+        np.subtract(y_out, y, out=delta[-1])
+        if self.output == "softmax":
+            loss = self._loss(y_out, y, m)
+        else:
+            loss = float(np.vdot(delta[-1], delta[-1])) / (2 * m)
+        loss += self.regularization(m)
+        if self.output == "relu":
+            np.greater(y_out, 0, out=mask[-1])
+            delta[-1] *= mask[-1]
+
+        if optimizer is not None:
+            optimizer.begin_step()
+        step = eta / m
+        decay = 1 - eta * self.lmbda / m
+        for h in range(self.n_layers - 1, -1, -1):
+            W, dW, db = self.weights[h], buffers["dW"][h], buffers["db"][h]
+            inputs = a[h - 1] if h > 0 else x
+            np.matmul(delta[h], inputs.T, out=dW)
+            np.sum(delta[h], axis=1, out=db)
+            if h > 0:
+                # Propagate through the weights before they are updated
+                np.matmul(W.T, delta[h], out=scratch[h - 1])
+                np.greater(a[h - 1], 0, out=mask[h - 1])
+                np.multiply(scratch[h - 1], mask[h - 1], out=delta[h - 1])
+            if optimizer is not None:
+                # Gradients as Backpropagation1 gives them: (delta @ inputs.T + lmbda * W) / m
+                dW *= 1 / m
+                if self.lmbda:
+                    dW += (self.lmbda / m) * W
+                db *= 1 / m
+                optimizer.update(2 * h, W, dW)
+                optimizer.update(2 * h + 1, self.biases[h][:, 0], db)
+                continue
+            # W -= eta * (delta @ inputs.T + lmbda * W) / m, without temporaries
+            W *= decay
+            dW *= step
+            W -= dW
+            db *= step
+            self.biases[h][:, 0] -= db
+        return loss
+
+    def fit(self, X, y, epochs=100, eta=0.05, batch_size=None, shuffle=True, seed=None, callback=None,
+            optimizer=None):
+        """
+        Train on X (features, samples) and y (outputs, samples). With
+        batch_size=None every epoch is one full-batch step, as in the
+        notebook's training(). optimizer, if given, replaces the plain
+        eta step. callback(model, epoch, loss) may return True to stop
+        early (see optimizers.EarlyStopping). Returns the mean batch loss
+        of each epoch.
+        """
+        X = np.asarray(X, dtype=self.dtype)
+        y = np.asarray(y, dtype=self.dtype).reshape(self.layer_sizes[-1], -1)
+        m = X.shape[1]
+        batch_size = min(batch_size or m, m)
+        # Buffers of earlier fits with other batch sizes are not needed any more
+        self._buffers = {size: buffers for size, buffers in self._buffers.items()
+                         if size in (batch_size, m % batch_size)}
+        rng = np.random.default_rng(seed)
+        order = np.arange(m)
+        losses = []
+
+        for epoch in range(epochs):
+            if batch_size == m:
+                # Full batch: train on X and y directly, no gather needed
+                epoch_loss = self._step(X, y, eta, self._batch_buffers(m), optimizer)
+            else:
+                if shuffle:
+                    rng.shuffle(order)
+                epoch_loss = 0.0
+                for start in range(0, m, batch_size):
+                    index = order[start:start + batch_size]
+                    buffers = self._batch_buffers(len(index), gather=True)
+                    np.take(X, index, axis=1, out=buffers["x"])
+                    np.take(y, index, axis=1, out=buffers["y"])
+                    epoch_loss += self._step(buffers["x"], buffers["y"], eta, buffers, optimizer) * len(index)
+                epoch_loss /= m
+            losses.append(epoch_loss)
+            if callback is not None and callback(self, epoch, epoch_loss):
+                break
+        return losses
+
+    def predict(self, X, batch_size=8192):
+        """Output activations (outputs, samples) for X (features, samples)"""
+        X = np.asarray(X, dtype=self.dtype)
+        out = np.empty((self.layer_sizes[-1], X.shape[1]), self.dtype)
+        for start in range(0, X.shape[1], batch_size):
+            x = X[:, start:start + batch_size]
+            out[:, start:start + x.shape[1]] = self._forward(x, self._batch_buffers(x.shape[1], cache=False))
+        return out
+
+    def loss(self, X, y):
+        """Loss (with regularisation) of the whole data set"""
+        y = np.asarray(y, dtype=self.dtype).reshape(self.layer_sizes[-1], -1)
+        m = y.shape[1]
+        return self._loss(self.predict(X), y, m) + self.regularization(m)
@@ -0,0 +1,290 @@
+"""
+Optimizers, learning-rate schedules and early stopping for the ANN trainers
+
+The optimizers update parameters in place and keep their state (velocity,
+squared-gradient averages) in arrays allocated on the first step, one per
+parameter. They are used in two ways:
+
+- optimizer.step(parameters, grads) after the notebook's Backpropagation1,
+  with parameters the [W1, b1, ...] list and grads its
+  {'dW1': ..., 'db1': ...} dict (or a list in parameter order);
+- MLP.fit(..., optimizer=optimizer), which calls begin_step() once per
+  batch and update() per parameter during the backward pass.
+
+A schedule maps the step number (counted from 1) to a learning rate.
+benchmark() measures the wall time each setup needs to reach a validation
+MAE.
+"""
+
+import math
+import time
+
+import numpy as np
+
+
+class Constant:
+    def __init__(self, lr):
+        self.lr = lr
+
+    def __call__(self, step):
+        return self.lr
+
+
+class StepDecay:
+    """lr * gamma ** ((step - 1) // step_size): the rate is cut every step_size steps"""
+
+    def __init__(self, lr, step_size, gamma=0.5):
+        self.lr = lr
+        self.step_size = step_size
+        self.gamma = gamma
+
+    def __call__(self, step):
+        return self.lr * self.gamma ** ((step - 1) // self.step_size)
+
+
+class Cosine:
+    """Cosine decay from lr to min_lr over total_steps, then min_lr"""
+
+    def __init__(self, lr, total_steps, min_lr=0.0):
+        self.lr = lr
+        self.total_steps = total_steps
+        self.min_lr = min_lr
+
+    def __call__(self, step):
+        progress = min(step - 1, self.total_steps) / self.total_steps
+        return self.min_lr + (self.lr - self.min_lr) * 0.5 * (1 + math.cos(math.pi * progress))
+
+
+class Warmup:
+    """Linear warmup over warmup_steps, then the wrapped schedule (counted from the end of warmup)"""
+
+    def __init__(self, schedule, warmup_steps):
+        self.schedule = schedule
+        self.warmup_steps = warmup_steps
+
+    def __call__(self, step):
+        if step <= self.warmup_steps:
+            return self.schedule(1) * step / self.warmup_steps
+        return self.schedule(step - self.warmup_steps)
+
+
+class Optimizer:
+    """Plain gradient descent; subclasses override update()"""
+
+    def __init__(self, lr=0.05, schedule=None):
+        self.schedule = schedule if schedule is not None else Constant(lr)
+        self.t = 0
+        self.lr = self.schedule(1)
+        self.state = {}
+
+    def begin_step(self):
+        self.t += 1
+        self.lr = self.schedule(self.t)
+
+    def update(self, index, param, grad):
+        """Update param in place from grad; index identifies the parameter's state"""
+        param -= self.lr * grad
+
+    def step(self, parameters, grads):
+        """One step for all parameters; grads is a list in the same order or Backpropagation1's dict"""
+        if isinstance(grads, dict):
+            grads = [grads[f"{kind}{layer + 1}"] for layer in range(len(parameters) // 2) for kind in ("dW", "db")]
+        self.begin_step()
+        for index, (param, grad) in enumerate(zip(parameters, grads)):
+            self.update(index, param, grad)
+        return parameters
+
+    def _buffers(self, index, param, count):
+        """The parameter's state arrays, zero-initialised on first use"""
+        buffers = self.state.get(index)
+        if buffers is None:
+            buffers = self.state[index] = [np.zeros_like(param) for _ in range(count)]
+        return buffers
+
+
+SGD = Optimizer
+
+
+class Momentum(Optimizer):
+    """Heavy-ball momentum, or Nesterov momentum with nesterov=True"""
+
+    def __init__(self, lr=0.05, momentum=0.9, nesterov=False, schedule=None):
+        super().__init__(lr, schedule)
+        self.momentum = momentum
+        self.nesterov = nesterov
+
+    def update(self, index, param, grad):
+        velocity, = self._buffers(index, param, 1)
+        velocity *= self.momentum
+        velocity -= self.lr * grad
+        if self.nesterov:
+            param += self.momentum * velocity
+            param -= self.lr * grad
+        else:
+            param += velocity
+
+
+class RMSProp(Optimizer):
+    def __init__(self, lr=0.001, rho=0.9, eps=1e-8, schedule=None):
+        super().__init__(lr, schedule)
+        self.rho = rho
+        self.eps = eps
+
+    def update(self, index, param, grad):
+        square_avg, scratch = self._buffers(index, param, 2)
+        square_avg *= self.rho
+        np.multiply(grad, grad, out=scratch)
+        scratch *= 1 - self.rho
+        square_avg += scratch
+        np.sqrt(square_avg, out=scratch)
+        scratch += self.eps
+        np.divide(grad, scratch, out=scratch)
+        scratch *= self.lr
+        param -= scratch
+
+
+class Adam(Optimizer):
+    def __init__(self, lr=0.001, beta1=0.9, beta2=0.999, eps=1e-8, schedule=None):
+        super().__init__(lr, schedule)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+
+    def update(self, index, param, grad):
+        m, v, scratch = self._buffers(index, param, 3)
+        m *= self.beta1
+        np.multiply(grad, 1 - self.beta1, out=scratch)
+        m += scratch
+        v *= self.beta2
+        np.multiply(grad, grad, out=scratch)
+        scratch *= 1 - self.beta2
+        v += scratch
+        # Bias corrections folded into the step size and epsilon
+        correction1 = 1 - self.beta1 ** self.t
+        correction2 = 1 - self.beta2 ** self.t
+        np.sqrt(v, out=scratch)
+        scratch += self.eps * math.sqrt(correction2)
+        np.divide(m, scratch, out=scratch)
+        scratch *= self.lr * math.sqrt(correction2) / correction1
+        param -= scratch
+
+
+class EarlyStopping:
+    """
+    MLP.fit callback that stops once the monitored loss has not improved by
+    more than min_delta (relative) for `patience` epochs. monitor(model)
+    gives the loss to watch; by default it is the epoch's training loss.
+    """
+
+    def __init__(self, patience=10, min_delta=1e-3, monitor=None):
+        self.patience = patience
+        self.min_delta = min_delta
+        self.monitor = monitor
+        self.best = math.inf
+        self.best_epoch = -1
+        self.history = []
+
+    def __call__(self, model, epoch, loss):
+        value = self.monitor(model) if self.monitor is not None else loss
+        self.history.append(value)
+        if not math.isfinite(value):
+            return True
+        if value < self.best * (1 - self.min_delta):
+            self.best, self.best_epoch = value, epoch
+        return epoch - self.best_epoch >= self.patience
+
+
+def mae(model, x, y):
+    return float(np.mean(np.abs(model.predict(x) - y)))
+
+
+def benchmark_setups():
+    """
+    Named (optimizer factory, batch size) setups compared by benchmark(); a
+    factory gets the total number of steps the run may take
+    """
+    return {
+        # The notebook's training(): full-batch gradient descent at eta=0.05
+        "notebook SGD (full batch)": (lambda steps: SGD(0.05), None),
+        "SGD (batch 256)": (lambda steps: SGD(0.05), 256),
+        "momentum (batch 256)": (lambda steps: Momentum(0.02, 0.9), 256),
+        "nesterov (batch 256)": (lambda steps: Momentum(0.02, 0.9, nesterov=True), 256),
+        "RMSProp (batch 256)": (lambda steps: RMSProp(0.001), 256),
+        "Adam (full batch)": (lambda steps: Adam(0.01), None),
+        "Adam (batch 256)": (lambda steps: Adam(0.002), 256),
+        "Adam + warmup/cosine (batch 256)": (
+            lambda steps: Adam(schedule=Warmup(Cosine(0.003, steps, 1e-4), steps // 50 + 1)), 256),
+        "Adam + step decay (batch 256)": (
+            lambda steps: Adam(schedule=StepDecay(0.003, steps // 4 + 1, 0.5)), 256),
+    }
+
+
+def benchmark(x_train, y_train, x_val, y_val, target_mae, layer_sizes=(16, 64, 64, 16), lmbda=0.0,
+              max_epochs=3000, max_seconds=120, setups=None, seed=0):
+    """
+    Train each setup until its validation MAE reaches target_mae (or the
+    epoch/time budget runs out). Returns one dict per setup with the epochs,
+    seconds and final MAE; seconds_to_target is None if it never got there.
+    """
+    from mlp import MLP
+
+    setups = setups or benchmark_setups()
+    sizes = [x_train.shape[0], *layer_sizes, y_train.shape[0]]
+    rows = []
+    for name, (make_optimizer, batch_size) in setups.items():
+        model = MLP(sizes, lmbda=lmbda, seed=seed)
+        steps_per_epoch = 1 if batch_size is None else math.ceil(x_train.shape[1] / batch_size)
+        optimizer = make_optimizer(max_epochs * steps_per_epoch)
+        curve = []
+        start = time.perf_counter()
+        state = {"reached": None}
+
+        def check(model, epoch, loss):
+            curve.append(mae(model, x_val, y_val))
+            if curve[-1] <= target_mae:
+                state["reached"] = (epoch + 1, time.perf_counter() - start)
+                return True
+            return not math.isfinite(loss) or time.perf_counter() - start > max_seconds
+
+        model.fit(x_train, y_train, epochs=max_epochs, batch_size=batch_size, seed=seed,
+                  optimizer=optimizer, callback=check)
+        reached = state["reached"]
+        rows.append({"setup": name, "epochs": len(curve), "seconds": time.perf_counter() - start,
+                     "epochs_to_target": reached[0] if reached else None,
+                     "seconds_to_target": reached[1] if reached else None,
+                     "final_mae": curve[-1] if curve else None, "mae_curve": curve})
+    return rows
+
+
+def print_benchmark(rows):
+    print(f"{'setup':>34} {'epochs to target':>17} {'seconds to target':>18} {'final MAE':>10}")
+    for row in rows:
+        epochs = "-" if row["epochs_to_target"] is None else row["epochs_to_target"]
+        seconds = "not reached" if row["seconds_to_target"] is None else f"{row['seconds_to_target']:.2f}"
+        print(f"{row['setup']:>34} {epochs:>17} {seconds:>18} {row['final_mae']:>10.5f}")
+
+
+def plot_benchmark(rows, target_mae=None):
+    """Validation MAE against epoch for every setup"""
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 6))
+    for row in rows:
+        plt.plot(np.arange(1, len(row["mae_curve"]) + 1), row["mae_curve"], label=row["setup"])
+    if target_mae is not None:
+        plt.axhline(target_mae, color='k', linestyle='--', label='target')
+    plt.xscale('log')
+    plt.xlabel('Epoch')
+    plt.ylabel('Validation MAE')
+    plt.title('Time to target MAE')
+    plt.legend(fontsize=8)
+    plt.show()
+
+
+if __name__ == "__main__":
+    from housing_data import load_housing
+
+    x, y, x_test, y_test, _ = load_housing()
+    order = np.random.default_rng(0).permutation(x.shape[1])
+    val, train = np.sort(order[:4000]), np.sort(order[4000:])
+    print_benchmark(benchmark(x[:, train], y[:, train], x[:, val], y[:, val], target_mae=0.10))
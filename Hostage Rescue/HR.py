@@ -1,16 +1,13 @@
 import pygame
 import random
 import math
-
-# Initialize Pygame
-pygame.init()
+from assets import assets, PLAYER_IMAGE, HOSTAGE_IMAGE, WALL_IMAGES
 
 # Screen dimensions
 WIDTH, HEIGHT = 600, 400
 TILE_SIZE = 40
 ROWS, COLS = HEIGHT // TILE_SIZE, WIDTH // TILE_SIZE
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Rescue the Hostage - Local Search")
+screen = None  # Created by init_display()
 
 # Colors
 WHITE = (240, 248, 255)
@@ -21,20 +18,6 @@ FLASH_COLOR = (50, 205, 50) # Victory flash color
 BUTTON_COLOR = (50, 205, 50) # Button color
 BUTTON_TEXT_COLOR = (255, 255, 255) # Button text color
 
-# Load images for player, hostage, and walls
-player_image = pygame.image.load("AI1.png")  
-hostage_image = pygame.image.load("AI2.png")  
-wall_images = [
-    pygame.image.load("AI3.png"),
-    pygame.image.load("AI4.png"),
-    pygame.image.load("AI5.png")
-]
-
-# Resize images to fit the grid
-wall_images = [pygame.transform.scale(img, (TILE_SIZE, TILE_SIZE)) for img in wall_images]
-player_image = pygame.transform.scale(player_image, (TILE_SIZE, TILE_SIZE))
-hostage_image = pygame.transform.scale(hostage_image, (TILE_SIZE, TILE_SIZE))
-
 # Constants for recent positions
 MAX_RECENT_POSITIONS = 10
 GENERATION_LIMIT = 50
@@ -47,13 +30,13 @@ def generate_obstacles(num_obstacles):
         new_obstacle = [random.randint(0, COLS-1), random.randint(0, ROWS-1)]
         if new_obstacle not in obstacles:  # Make sure obstacles are not overlapping
             obstacles.append(new_obstacle)
-    obstacle_images = [random.choice(wall_images) for _ in obstacles]
-    return obstacles, obstacle_images
+    obstacle_walls = [random.choice(WALL_IMAGES) for _ in obstacles]  # Image names, loaded on draw
+    return obstacles, obstacle_walls
 
 # Function to start a new game
 def start_new_game():
-    global player_pos, hostage_pos, recent_positions, obstacles, obstacle_images
-    obstacles, obstacle_images = generate_obstacles(20)
+    global player_pos, hostage_pos, recent_positions, obstacles, obstacle_walls
+    obstacles, obstacle_walls = generate_obstacles(20)
     recent_positions = []
 
     # Generate player and hostage positions with a larger distance
@@ -126,6 +109,14 @@ def store_recent_position(recent_positions, new_player_pos, max_positions=MAX_RE
     #todo
     pass
 
+# Function to open the game window
+def init_display():
+    global screen
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Rescue the Hostage - Local Search")
+    return screen
+
 # Function to show victory flash
 def victory_flash():
     for _ in range(5):
@@ -176,61 +167,67 @@ def get_algorithm_choice():
             print("Invalid choice. Please choose 1, 2, or 3.")
 
 # Main game loop
-running = True
-clock = pygame.time.Clock()
-start_new_game()
-button_rect = pygame.Rect(0, 0, 0, 0)
-
-# Get the algorithm choice from the player
-chosen_algorithm = get_algorithm_choice()
-
-while running:
-    screen.fill(WHITE)
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    # Perform the chosen algorithm step
-    new_player_pos = chosen_algorithm(player_pos, hostage_pos, obstacles)
-
-    # Check for stuck situations
-    if new_player_pos == player_pos or in_loop(recent_positions, new_player_pos):
-        # Perform a random move when stuck
-        new_player_pos = random_move(player_pos, obstacles)
-
-    # Update recent positions
-    store_recent_position(recent_positions, new_player_pos)
-    # Update player's position
-    player_pos = new_player_pos
-
-    # Draw the grid background
-    for row in range(ROWS):
-        for col in range(COLS):
-            rect = pygame.Rect(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-            pygame.draw.rect(screen, LIGHT_GREY, rect, 1)
-
-    # Draw obstacles
-    for idx, obs in enumerate(obstacles):
-        obs_rect = pygame.Rect(obs[0] * TILE_SIZE, obs[1] * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-        screen.blit(obstacle_images[idx], obs_rect)
-
-    # Draw player
-    player_rect = pygame.Rect(player_pos[0] * TILE_SIZE, player_pos[1] * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-    screen.blit(player_image, player_rect)
-
-    # Draw hostage
-    hostage_rect = pygame.Rect(hostage_pos[0] * TILE_SIZE, hostage_pos[1] * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-    screen.blit(hostage_image, hostage_rect)
-
-    # Check if player reached the hostage
-    if player_pos == hostage_pos:
-        print("Hostage Rescued!")
-        victory_flash()  # Show the victory flash
-        show_button_and_wait("New Game", button_rect)
-        start_new_game()
-
-    # Update the display
-    pygame.display.flip()
-    clock.tick(5)  # Lower frame rate for smoother performance
+def main():
+    global player_pos
+    init_display()
+    running = True
+    clock = pygame.time.Clock()
+    start_new_game()
+    button_rect = pygame.Rect(0, 0, 0, 0)
+
+    # Get the algorithm choice from the player
+    chosen_algorithm = get_algorithm_choice()
+
+    while running:
+        screen.fill(WHITE)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+        # Perform the chosen algorithm step
+        new_player_pos = chosen_algorithm(player_pos, hostage_pos, obstacles)
+
+        # Check for stuck situations
+        if new_player_pos == player_pos or in_loop(recent_positions, new_player_pos):
+            # Perform a random move when stuck
+            new_player_pos = random_move(player_pos, obstacles)
+
+        # Update recent positions
+        store_recent_position(recent_positions, new_player_pos)
+        # Update player's position
+        player_pos = new_player_pos
+
+        # Draw the grid background
+        for row in range(ROWS):
+            for col in range(COLS):
+                rect = pygame.Rect(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+                pygame.draw.rect(screen, LIGHT_GREY, rect, 1)
+
+        # Draw obstacles
+        for idx, obs in enumerate(obstacles):
+            obs_rect = pygame.Rect(obs[0] * TILE_SIZE, obs[1] * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+            screen.blit(assets.image(obstacle_walls[idx], TILE_SIZE), obs_rect)
+
+        # Draw player
+        player_rect = pygame.Rect(player_pos[0] * TILE_SIZE, player_pos[1] * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+        screen.blit(assets.image(PLAYER_IMAGE, TILE_SIZE), player_rect)
+
+        # Draw hostage
+        hostage_rect = pygame.Rect(hostage_pos[0] * TILE_SIZE, hostage_pos[1] * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+        screen.blit(assets.image(HOSTAGE_IMAGE, TILE_SIZE), hostage_rect)
+
+        # Check if player reached the hostage
+        if player_pos == hostage_pos:
+            print("Hostage Rescued!")
+            victory_flash()  # Show the victory flash
+            show_button_and_wait("New Game", button_rect)
+            start_new_game()
+
+        # Update the display
+        pygame.display.flip()
+        clock.tick(5)  # Lower frame rate for smoother performance
+
+    pygame.quit()
 
-pygame.quit()
+if __name__ == "__main__":
+    main()
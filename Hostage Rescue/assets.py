@@ -0,0 +1,58 @@
+"""
+Lazy image loading for the Hostage Rescue games
+"""
+
+import os
+
+import pygame
+
+# Images live next to this module, whatever the working directory is
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PLAYER_IMAGE = "AI1.png"
+HOSTAGE_IMAGE = "AI2.png"
+WALL_IMAGES = ["AI3.png", "AI4.png", "AI5.png"]
+
+
+class AssetManager:
+    """
+    Loads images on first use and caches one scaled surface per
+    (name, tile size). Scaled surfaces are converted to the display format
+    with convert_alpha() once a window exists, for fast blitting.
+    """
+
+    def __init__(self, directory=ASSET_DIR):
+        self.directory = directory
+        self._sources = {}
+        self._scaled = {}
+
+    def path(self, name):
+        """Absolute path of an image file"""
+        return os.path.join(self.directory, name)
+
+    def source(self, name):
+        """Decoded image at its original size"""
+        if name not in self._sources:
+            self._sources[name] = pygame.image.load(self.path(name))
+        return self._sources[name]
+
+    def image(self, name, size):
+        """Image scaled to a size x size tile"""
+        key = (name, size)
+        surface = self._scaled.get(key)
+        if surface is None:
+            surface = pygame.transform.scale(self.source(name), (size, size))
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert_alpha()
+                self._scaled[key] = surface
+            # Without a window the surface can't be converted yet, so it
+            # is not cached and will be converted on a later call
+        return surface
+
+    def clear(self):
+        """Drop every cached surface"""
+        self._sources.clear()
+        self._scaled.clear()
+
+
+assets = AssetManager()
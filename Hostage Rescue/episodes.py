@@ -0,0 +1,199 @@
+"""
+Recording, storage and headless replay of Hostage Rescue episodes.
+
+A trace is a compressed .npz file holding the episode seed, the algorithm
+name, the grid size, the obstacle map, the hostage position and the player
+position at every tick (row 0 is the start). Because localsearch seeds
+`random` once per episode, re-running the algorithm with the recorded seed
+reproduces the episode exactly.
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+TRACE_VERSION = 1
+
+
+class EpisodeRecorder:
+    """Collects one episode at a time and writes it as a trace"""
+
+    def __init__(self, algorithm, rows, cols):
+        self.algorithm = algorithm
+        self.rows = rows
+        self.cols = cols
+        self.seed = None
+        self.obstacles = []
+        self.hostage_pos = None
+        self.positions = []
+
+    def start(self, seed, obstacles, player_pos, hostage_pos):
+        """Begin a new episode from its seed and initial state"""
+        self.seed = seed
+        self.obstacles = [list(o) for o in obstacles]
+        self.hostage_pos = list(hostage_pos)
+        self.positions = [list(player_pos)]
+
+    def record(self, player_pos):
+        """Append the player position after a tick"""
+        self.positions.append(list(player_pos))
+
+    def to_trace(self):
+        """The current episode as a dict of arrays"""
+        return {
+            "version": np.int16(TRACE_VERSION),
+            "seed": np.int64(self.seed),
+            "algorithm": np.str_(self.algorithm),
+            "shape": np.array([self.rows, self.cols], dtype=np.int16),
+            "obstacles": np.array(self.obstacles, dtype=np.int16).reshape(-1, 2),
+            "hostage": np.array(self.hostage_pos, dtype=np.int16),
+            "positions": np.array(self.positions, dtype=np.int16).reshape(-1, 2),
+        }
+
+    def save(self, path):
+        """Write the current episode; returns the path written"""
+        return save_trace(path, self.to_trace())
+
+
+def save_trace(path, trace):
+    """Write a trace dict to a compressed .npz file"""
+    if not path.endswith(".npz"):
+        path += ".npz"
+    np.savez_compressed(path, **trace)
+    return path
+
+
+def load_trace(path):
+    """Read a trace written by save_trace"""
+    with np.load(path) as data:
+        trace = {key: data[key] for key in data.files}
+    if int(trace["version"]) != TRACE_VERSION:
+        raise ValueError(f"Unsupported trace version {int(trace['version'])} in {path}")
+    trace["seed"] = int(trace["seed"])
+    trace["algorithm"] = str(trace["algorithm"])
+    return trace
+
+
+def validate_trace(trace):
+    """
+    Check that every tick is a legal move (stay or one step, in bounds, not
+    into an obstacle). Returns a list of problems, empty if the trace is valid.
+    """
+    rows, cols = (int(v) for v in trace["shape"])
+    positions = trace["positions"].astype(np.int64)
+    problems = []
+
+    blocked = np.zeros((rows, cols), dtype=bool)
+    blocked[trace["obstacles"][:, 1], trace["obstacles"][:, 0]] = True
+
+    x, y = positions[:, 0], positions[:, 1]
+    inside = (x >= 0) & (x < cols) & (y >= 0) & (y < rows)
+    for tick in np.flatnonzero(~inside):
+        problems.append(f"tick {tick}: position {positions[tick].tolist()} is off the grid")
+    on_obstacle = np.zeros(len(positions), dtype=bool)
+    on_obstacle[inside] = blocked[y[inside], x[inside]]
+    for tick in np.flatnonzero(on_obstacle):
+        problems.append(f"tick {tick}: position {positions[tick].tolist()} is an obstacle")
+
+    step_sizes = np.abs(np.diff(positions, axis=0)).sum(axis=1)
+    for tick in np.flatnonzero(step_sizes > 1):
+        problems.append(f"tick {tick + 1}: jump from {positions[tick].tolist()} "
+                        f"to {positions[tick + 1].tolist()}")
+    return problems
+
+
+def is_rescue(trace):
+    """True if the episode ends on the hostage"""
+    return bool((trace["positions"][-1] == trace["hostage"]).all())
+
+
+def run_episode(algorithm, seed, max_steps=10000):
+    """
+    Play one episode headless (no window, no frame cap) and return its trace.
+    The episode stops at the rescue or after max_steps ticks.
+    """
+    import localsearch
+
+    step_function = getattr(localsearch, algorithm)
+    localsearch.start_new_game(seed)
+    recorder = EpisodeRecorder(algorithm, localsearch.ROWS, localsearch.COLS)
+    recorder.start(seed, localsearch.obstacles, localsearch.player_pos, localsearch.hostage_pos)
+    for _ in range(max_steps):
+        if localsearch.player_pos == localsearch.hostage_pos:
+            break
+        recorder.record(localsearch.advance_player(step_function))
+    return recorder.to_trace()
+
+
+def replay_trace(trace):
+    """
+    Re-run a trace's algorithm from its seed and compare tick by tick.
+    Returns the first tick where the replay diverges, or None if identical.
+    """
+    expected = trace["positions"]
+    replayed = run_episode(trace["algorithm"], trace["seed"], max_steps=len(expected) - 1)
+    if not np.array_equal(replayed["obstacles"], trace["obstacles"]):
+        return 0
+    actual = replayed["positions"]
+    length = min(len(actual), len(expected))
+    diverged = np.flatnonzero((actual[:length] != expected[:length]).any(axis=1))
+    if len(diverged):
+        return int(diverged[0])
+    if len(actual) != len(expected):
+        return length
+    return None
+
+
+def record_episodes(algorithm, seeds, out_dir, max_steps=10000):
+    """Record one headless episode per seed into out_dir"""
+    os.makedirs(out_dir, exist_ok=True)
+    for seed in seeds:
+        start = time.perf_counter()
+        trace = run_episode(algorithm, seed, max_steps)
+        elapsed = time.perf_counter() - start
+        path = save_trace(os.path.join(out_dir, f"{algorithm}_{seed}.npz"), trace)
+        steps = len(trace["positions"]) - 1
+        status = "rescued" if is_rescue(trace) else "not rescued"
+        print(f"{path}: {steps} steps, {status} ({elapsed * 1000:.1f} ms)")
+
+
+def check_traces(paths):
+    """Validate and replay trace files; returns True if all of them pass"""
+    all_ok = True
+    for path in paths:
+        trace = load_trace(path)
+        problems = validate_trace(trace)
+        start = time.perf_counter()
+        diverged = replay_trace(trace)
+        elapsed = time.perf_counter() - start
+        if diverged is not None:
+            problems.append(f"replay diverges at tick {diverged}")
+        all_ok = all_ok and not problems
+        steps = len(trace["positions"]) - 1
+        print(f"{path}: {trace['algorithm']}, seed {trace['seed']}, {steps} steps, "
+              f"replayed in {elapsed * 1000:.1f} ms - {'OK' if not problems else 'FAILED'}")
+        for problem in problems:
+            print(f"  {problem}")
+    return all_ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record and replay Hostage Rescue episodes")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="record headless episodes")
+    record.add_argument("algorithm", help="step function name, e.g. hill_climbing")
+    record.add_argument("--seeds", type=int, nargs="+", default=[0], help="episode seeds")
+    record.add_argument("--out", default="traces", help="output directory")
+    record.add_argument("--max-steps", type=int, default=10000)
+
+    check = commands.add_parser("check", help="validate and replay trace files")
+    check.add_argument("paths", nargs="+")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record_episodes(args.algorithm, args.seeds, args.out, args.max_steps)
+    else:
+        raise SystemExit(0 if check_traces(args.paths) else 1)
@@ -1,16 +1,18 @@
 import pygame
 import random
 import math
-
-# Initialize Pygame
-pygame.init()
+import argparse
+import os
+from planner import DistanceField, astar
+from renderer import GridRenderer
+from assets import assets, PLAYER_IMAGE, HOSTAGE_IMAGE, WALL_IMAGES
+from episodes import EpisodeRecorder
 
 # Screen dimensions
 WIDTH, HEIGHT = 600, 400
 TILE_SIZE = 40
 ROWS, COLS = HEIGHT // TILE_SIZE, WIDTH // TILE_SIZE
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Rescue the Hostage - Local Search")
+screen = None  # Created by init_display()
 
 # Colors
 WHITE = (240, 248, 255)
@@ -21,25 +23,14 @@ FLASH_COLOR = (50, 205, 50) # Victory flash color
 BUTTON_COLOR = (50, 205, 50) # Button color
 BUTTON_TEXT_COLOR = (255, 255, 255) # Button text color
 
-# Load images for player, hostage, and walls
-player_image = pygame.image.load("AI1.png")  
-hostage_image = pygame.image.load("AI2.png")  
-wall_images = [
-    pygame.image.load("AI3.png"),
-    pygame.image.load("AI4.png"),
-    pygame.image.load("AI5.png")
-]
-
-# Resize images to fit the grid
-wall_images = [pygame.transform.scale(img, (TILE_SIZE, TILE_SIZE)) for img in wall_images]
-player_image = pygame.transform.scale(player_image, (TILE_SIZE, TILE_SIZE))
-hostage_image = pygame.transform.scale(hostage_image, (TILE_SIZE, TILE_SIZE))
-
 # Constants for recent positions
 MAX_RECENT_POSITIONS = 10
 GENERATION_LIMIT = 50
 MUTATION_RATE = 0.1
 
+# Frame rate cap for the main loop (0 runs uncapped)
+FPS = 5
+
 # Function to generate obstacles
 def generate_obstacles(num_obstacles):
     obstacles = []
@@ -47,14 +38,21 @@ def generate_obstacles(num_obstacles):
         new_obstacle = [random.randint(0, COLS-1), random.randint(0, ROWS-1)]
         if new_obstacle not in obstacles:  # Make sure obstacles are not overlapping
             obstacles.append(new_obstacle)
-    obstacle_images = [random.choice(wall_images) for _ in obstacles]
-    return obstacles, obstacle_images
+    obstacle_walls = [random.choice(WALL_IMAGES) for _ in obstacles]  # Image names, loaded on draw
+    return obstacles, obstacle_walls
 
 # Function to start a new game
-def start_new_game():
-    global player_pos, hostage_pos, recent_positions, obstacles, obstacle_images
-    obstacles, obstacle_images = generate_obstacles(20)
+def start_new_game(seed=None):
+    global player_pos, hostage_pos, recent_positions, obstacles, obstacle_walls, distance_field, steps_taken, optimal_steps, episode_seed
+    # Seed the whole episode (map and moves) so it can be replayed exactly
+    if seed is None:
+        seed = random.SystemRandom().randrange(2**32)
+    episode_seed = seed
+    random.seed(seed)
+
+    obstacles, obstacle_walls = generate_obstacles(20)
     recent_positions = []
+    steps_taken = 0
 
     # Generate player and hostage positions with a larger distance
     while True:
@@ -62,11 +60,22 @@ def start_new_game():
         hostage_pos = [random.randint(0, COLS-1), random.randint(0, ROWS-1)]
         distance = math.dist(player_pos, hostage_pos)
         if distance > 8 and player_pos not in obstacles and hostage_pos not in obstacles:
-            break
+            # Distance field to the hostage, computed once per map
+            distance_field = DistanceField(ROWS, COLS, obstacles, hostage_pos)
+            if distance_field.is_reachable(player_pos):
+                break
+
+    optimal_steps = distance_field.distance(player_pos)
+
+# Function to get the obstacle-aware distance to the hostage
+def path_distance(position, hostage):
+    if distance_field.goal == tuple(hostage):
+        return distance_field.distance(position)
+    return math.dist(position, hostage)  # No field for this target
 
 # Function to move the player closer to the hostage using Hill Climbing algorithm
 def hill_climbing(player, hostage, obstacles):
-    current_distance = math.dist(player, hostage)
+    current_distance = path_distance(player, hostage)
     neighbors = [
         [player[0] + 1, player[1]],  # Move right
         [player[0] - 1, player[1]],  # Move left
@@ -86,7 +95,7 @@ def hill_climbing(player, hostage, obstacles):
     best_distance = current_distance
     
     for neighbor in valid_neighbors:
-        new_distance = math.dist(neighbor, hostage)
+        new_distance = path_distance(neighbor, hostage)
         if new_distance < best_distance:
             best_distance = new_distance
             best_neighbor = neighbor
@@ -98,7 +107,7 @@ def simulated_annealing(player, hostage, obstacles):
     temperature = 100  # Initial temperature
     cooling_rate = 0.99
 
-    current_distance = math.dist(player, hostage)
+    current_distance = path_distance(player, hostage)
     neighbors = [
         [player[0] + 1, player[1]],  # Move right
         [player[0] - 1, player[1]],  # Move left
@@ -114,7 +123,7 @@ def simulated_annealing(player, hostage, obstacles):
         return player
 
     best_neighbor = random.choice(valid_neighbors)
-    best_distance = math.dist(best_neighbor, hostage)
+    best_distance = path_distance(best_neighbor, hostage)
 
     # Acceptance probability function
     def acceptance_probability(old_cost, new_cost, temp):
@@ -135,7 +144,7 @@ def genetic_algorithm(player, hostage, obstacles):
 
     # Fitness function
     def fitness(individual):
-        return -math.dist(individual[-1], hostage)
+        return -path_distance(individual[-1], hostage)
 
     # Generate random population
     def generate_population():
@@ -172,6 +181,13 @@ def genetic_algorithm(player, hostage, obstacles):
 
     return population[0][-1]  # Return the best individual
 
+# Function to move the player along an A* path (baseline for comparison)
+def a_star_search(player, hostage, obstacles):
+    path = astar(player, hostage, ROWS, COLS, obstacles)
+    if not path or len(path) < 2:
+        return player  # No path or already there
+    return path[1]
+
 # Function to check if the player is stuck in a loop
 def in_loop(recent_positions, player):
     return recent_positions.count(tuple(player)) > 2  # Check for repeated positions
@@ -199,6 +215,36 @@ def store_recent_position(recent_positions, new_player_pos, max_positions=MAX_RE
     if len(recent_positions) > max_positions:
         recent_positions.pop(0)
 
+# Function to advance the player one step with the chosen algorithm
+def advance_player(chosen_algorithm):
+    global player_pos, steps_taken
+    new_player_pos = chosen_algorithm(player_pos, hostage_pos, obstacles)
+
+    # Check for stuck situations
+    if new_player_pos == player_pos or in_loop(recent_positions, new_player_pos):
+        # Perform a random move when stuck
+        new_player_pos = random_move(player_pos, obstacles)
+
+    # Update recent positions
+    store_recent_position(recent_positions, new_player_pos)
+    # Update player's position
+    player_pos = new_player_pos
+    steps_taken += 1
+    return player_pos
+
+# Function to open the game window
+def init_display():
+    global screen
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Rescue the Hostage - Local Search")
+    return screen
+
+# Function to pre-render the obstacles of the current map
+def draw_new_map(renderer):
+    wall_surfaces = [assets.image(name, TILE_SIZE) for name in obstacle_walls]
+    renderer.set_map(obstacles, wall_surfaces)
+
 # Function to show victory flash
 def victory_flash():
     for _ in range(5):
@@ -236,74 +282,76 @@ def get_algorithm_choice():
     print("1: Hill Climbing")
     print("2: Simulated Annealing")
     print("3: Genetic Algorithm")
+    print("4: A* Search")
 
     while True:
-        choice = input("Enter the number of the algorithm you want to use (1/2/3): ")
+        choice = input("Enter the number of the algorithm you want to use (1/2/3/4): ")
         if choice == "1":
             return hill_climbing
         elif choice == "2":
             return simulated_annealing
         elif choice == "3":
             return genetic_algorithm
+        elif choice == "4":
+            return a_star_search
         else:
-            print("Invalid choice. Please choose 1, 2, or 3.")
+            print("Invalid choice. Please choose 1, 2, 3, or 4.")
 
 # Main game loop
-running = True
-clock = pygame.time.Clock()
-start_new_game()
-button_rect = pygame.Rect(0, 0, 0, 0)
-
-# Get the algorithm choice from the player
-chosen_algorithm = get_algorithm_choice()
-
-while running:
-    screen.fill(WHITE)
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    # Perform the chosen algorithm step
-    new_player_pos = chosen_algorithm(player_pos, hostage_pos, obstacles)
-
-    # Check for stuck situations
-    if new_player_pos == player_pos or in_loop(recent_positions, new_player_pos):
-        # Perform a random move when stuck
-        new_player_pos = random_move(player_pos, obstacles)
-
-    # Update recent positions
-    store_recent_position(recent_positions, new_player_pos)
-    # Update player's position
-    player_pos = new_player_pos
-
-    # Draw the grid background
-    for row in range(ROWS):
-        for col in range(COLS):
-            rect = pygame.Rect(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-            pygame.draw.rect(screen, LIGHT_GREY, rect, 1)
-
-    # Draw obstacles
-    for idx, obs in enumerate(obstacles):
-        obs_rect = pygame.Rect(obs[0] * TILE_SIZE, obs[1] * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-        screen.blit(obstacle_images[idx], obs_rect)
-
-    # Draw player
-    player_rect = pygame.Rect(player_pos[0] * TILE_SIZE, player_pos[1] * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-    screen.blit(player_image, player_rect)
-
-    # Draw hostage
-    hostage_rect = pygame.Rect(hostage_pos[0] * TILE_SIZE, hostage_pos[1] * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-    screen.blit(hostage_image, hostage_rect)
-
-    # Check if player reached the hostage
-    if player_pos == hostage_pos:
-        print("Hostage Rescued!")
-        victory_flash()  # Show the victory flash
-        show_button_and_wait("New Game", button_rect)
-        start_new_game()
-
-    # Update the display
-    pygame.display.flip()
-    clock.tick(5)  # Lower frame rate for smoother performance
-
-pygame.quit()
+def main(seed=None, record_dir=None):
+    init_display()
+    running = True
+    clock = pygame.time.Clock()
+    renderer = GridRenderer(screen, ROWS, COLS, TILE_SIZE, WHITE, LIGHT_GREY)
+    start_new_game(seed)
+    draw_new_map(renderer)
+    button_rect = pygame.Rect(0, 0, 0, 0)
+
+    # Get the algorithm choice from the player
+    chosen_algorithm = get_algorithm_choice()
+
+    # Record each episode to a trace file if requested
+    recorder = None
+    if record_dir:
+        os.makedirs(record_dir, exist_ok=True)
+        recorder = EpisodeRecorder(chosen_algorithm.__name__, ROWS, COLS)
+        recorder.start(episode_seed, obstacles, player_pos, hostage_pos)
+
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+        # Perform the chosen algorithm step
+        advance_player(chosen_algorithm)
+        if recorder:
+            recorder.record(player_pos)
+
+        # Draw player and hostage; only the tiles that changed are updated
+        player_image = assets.image(PLAYER_IMAGE, TILE_SIZE)
+        hostage_image = assets.image(HOSTAGE_IMAGE, TILE_SIZE)
+        renderer.draw([(player_image, player_pos), (hostage_image, hostage_pos)])
+
+        # Check if player reached the hostage
+        if player_pos == hostage_pos:
+            print(f"Hostage Rescued in {steps_taken} steps (shortest path: {optimal_steps})")
+            if recorder:
+                path = recorder.save(os.path.join(record_dir, f"episode_{episode_seed}.npz"))
+                print(f"Episode saved to {path}")
+            victory_flash()  # Show the victory flash
+            show_button_and_wait("New Game", button_rect)
+            start_new_game()
+            draw_new_map(renderer)
+            if recorder:
+                recorder.start(episode_seed, obstacles, player_pos, hostage_pos)
+
+        clock.tick(FPS)
+
+    pygame.quit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rescue the Hostage - Local Search")
+    parser.add_argument("--seed", type=int, help="seed for the first episode")
+    parser.add_argument("--record", metavar="DIR", help="save every episode as a trace in DIR")
+    args = parser.parse_args()
+    main(seed=args.seed, record_dir=args.record)
@@ -0,0 +1,199 @@
+"""
+Path planning for the Hostage Rescue agent: a BFS distance field towards the
+hostage and an A* search used as a baseline for comparison
+"""
+
+import heapq
+
+import numpy as np
+
+# Distance reported for cells that cannot reach the goal (or are blocked)
+UNREACHABLE = np.iinfo(np.int32).max
+
+# 4-connected moves as (dx, dy), matching the local search neighbours
+MOVES = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+
+def _expand_wavefront(dist, frontier, free, level):
+    """
+    Grow a wavefront of cells at distance `level` one ring per iteration,
+    lowering every free cell whose stored distance is larger. Works on a
+    single (rows, cols) field or a stack of fields along a leading axis;
+    each ring is a flat index array, so the work is proportional to the
+    number of cells that change.
+    """
+    rows, cols = dist.shape[-2:]
+    plane = rows * cols
+    flat = dist.reshape(-1)  # View: dist is C-contiguous
+    free_flat = free.reshape(-1)
+    ring = np.flatnonzero(frontier)
+    while ring.size:
+        level += 1
+        cell = ring % plane
+        col, row = cell % cols, cell // cols
+        ring = np.concatenate([
+            ring[col < cols - 1] + 1,
+            ring[col > 0] - 1,
+            ring[row < rows - 1] + cols,
+            ring[row > 0] - cols,
+        ])
+        ring = ring[free_flat[ring % plane]]
+        ring = np.unique(ring[flat[ring] > level])
+        flat[ring] = level
+
+
+class DistanceField:
+    """
+    Shortest-path distance (in moves) from every grid cell to a goal cell.
+
+    Positions use the game's [x, y] (column, row) convention. The field is
+    computed once per map with a vectorised breadth-first wavefront and kept
+    up to date incrementally when single obstacles are added or removed.
+    """
+
+    def __init__(self, rows, cols, obstacles, goal):
+        self.rows = rows
+        self.cols = cols
+        self.blocked = np.zeros((rows, cols), dtype=bool)
+        for x, y in obstacles:
+            self.blocked[y, x] = True
+        self.dist = np.full((rows, cols), UNREACHABLE, dtype=np.int32)
+        self.goal = tuple(goal)
+        self.recompute()
+
+    def recompute(self):
+        """Rebuild the whole field from the goal"""
+        self.dist.fill(UNREACHABLE)
+        x, y = self.goal
+        if self.blocked[y, x]:
+            return
+        self.dist[y, x] = 0
+        frontier = np.zeros_like(self.blocked)
+        frontier[y, x] = True
+        self._expand(frontier, 0)
+
+    def set_goal(self, goal):
+        """Move the goal and rebuild the field"""
+        self.goal = tuple(goal)
+        self.recompute()
+
+    def _expand(self, frontier, level):
+        _expand_wavefront(self.dist, frontier, ~self.blocked, level)
+
+    def add_obstacle(self, pos):
+        """Block a cell; only cells farther than it from the goal can change"""
+        x, y = pos
+        if self.blocked[y, x]:
+            return
+        self.blocked[y, x] = True
+        level = int(self.dist[y, x])
+        if level == UNREACHABLE:
+            return
+        if (x, y) == self.goal:
+            self.dist.fill(UNREACHABLE)
+            return
+        # Cells at or below `level` have shortest paths that avoid the new
+        # obstacle, so restart the wavefront from that ring
+        self.dist[y, x] = UNREACHABLE
+        self.dist[self.dist > level] = UNREACHABLE
+        self._expand(self.dist == level, level)
+
+    def remove_obstacle(self, pos):
+        """Free a cell; distances can only shrink, spreading out from it"""
+        x, y = pos
+        if not self.blocked[y, x]:
+            return
+        self.blocked[y, x] = False
+        if (x, y) == self.goal:
+            self.recompute()
+            return
+        best = UNREACHABLE
+        for nx, ny in self.neighbours(pos):
+            best = min(best, int(self.dist[ny, nx]))
+        if best == UNREACHABLE:
+            return
+        self.dist[y, x] = best + 1
+        frontier = np.zeros_like(self.blocked)
+        frontier[y, x] = True
+        self._expand(frontier, best + 1)
+
+    def neighbours(self, pos):
+        """Free in-bounds neighbours of pos as [x, y] lists"""
+        result = []
+        for dx, dy in MOVES:
+            nx, ny = pos[0] + dx, pos[1] + dy
+            if 0 <= nx < self.cols and 0 <= ny < self.rows and not self.blocked[ny, nx]:
+                result.append([nx, ny])
+        return result
+
+    def distance(self, pos):
+        """Number of moves from pos to the goal (UNREACHABLE if none)"""
+        return int(self.dist[pos[1], pos[0]])
+
+    def is_reachable(self, pos):
+        """Check if the goal can be reached from pos"""
+        return self.distance(pos) != UNREACHABLE
+
+    def next_step(self, pos):
+        """Neighbour of pos on a shortest path to the goal (pos itself if none)"""
+        best, best_distance = list(pos), self.distance(pos)
+        for neighbour in self.neighbours(pos):
+            d = self.distance(neighbour)
+            if d < best_distance:
+                best, best_distance = neighbour, d
+        return best
+
+
+def distance_fields(blocked, goals):
+    """
+    Distance fields for many goals at once, shape (len(goals), rows, cols).
+    `blocked` is a (rows, cols) boolean obstacle mask and `goals` a sequence
+    of [x, y] positions; all wavefronts are grown together.
+    """
+    goals = np.asarray(goals, dtype=np.intp).reshape(-1, 2)
+    rows, cols = blocked.shape
+    dist = np.full((len(goals), rows, cols), UNREACHABLE, dtype=np.int32)
+    frontier = np.zeros(dist.shape, dtype=bool)
+    index = np.arange(len(goals))
+    frontier[index, goals[:, 1], goals[:, 0]] = True
+    frontier &= ~blocked
+    dist[frontier] = 0
+    _expand_wavefront(dist, frontier, ~blocked, 0)
+    return dist
+
+
+def astar(start, goal, rows, cols, obstacles):
+    """
+    A* search on the 4-connected grid with a Manhattan heuristic.
+    Returns the path from start to goal as [x, y] lists, or None.
+    """
+    blocked = {tuple(o) for o in obstacles}
+    start, goal = tuple(start), tuple(goal)
+
+    def heuristic(cell):
+        return abs(cell[0] - goal[0]) + abs(cell[1] - goal[1])
+
+    open_heap = [(heuristic(start), 0, start)]
+    came_from = {start: None}
+    g_score = {start: 0}
+
+    while open_heap:
+        _, g, cell = heapq.heappop(open_heap)
+        if cell == goal:
+            path = []
+            while cell is not None:
+                path.append(list(cell))
+                cell = came_from[cell]
+            return path[::-1]
+        if g > g_score[cell]:
+            continue  # Stale heap entry
+        for dx, dy in MOVES:
+            nxt = (cell[0] + dx, cell[1] + dy)
+            if not (0 <= nxt[0] < cols and 0 <= nxt[1] < rows) or nxt in blocked:
+                continue
+            if g + 1 < g_score.get(nxt, UNREACHABLE):
+                g_score[nxt] = g + 1
+                came_from[nxt] = cell
+                heapq.heappush(open_heap, (g + 1 + heuristic(nxt), g + 1, nxt))
+
+    return None
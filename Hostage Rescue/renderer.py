@@ -0,0 +1,73 @@
+"""
+Dirty-rectangle renderer for the Hostage Rescue grid
+"""
+
+import pygame
+
+
+class GridRenderer:
+    """
+    Draws the game with a cached background layer.
+
+    The grid lines and obstacles are pre-rendered once per map into a
+    background surface. Each frame only the tiles whose sprites moved are
+    restored from the background and redrawn, and only those rectangles are
+    pushed to the display.
+    """
+
+    def __init__(self, screen, rows, cols, tile_size, background_color, grid_color):
+        self.screen = screen
+        self.rows = rows
+        self.cols = cols
+        self.tile_size = tile_size
+        self.background_color = background_color
+        self.grid_color = grid_color
+        self.background = pygame.Surface(screen.get_size()).convert()
+        self.drawn = {}  # (x, y) -> image currently drawn on that tile
+
+    def tile_rect(self, pos):
+        """Screen rectangle of the tile at grid position [x, y]"""
+        return pygame.Rect(pos[0] * self.tile_size, pos[1] * self.tile_size,
+                           self.tile_size, self.tile_size)
+
+    def set_map(self, obstacles, obstacle_images):
+        """Pre-render the static grid and obstacle layer for a new map"""
+        self.background.fill(self.background_color)
+        for row in range(self.rows):
+            for col in range(self.cols):
+                pygame.draw.rect(self.background, self.grid_color,
+                                 self.tile_rect((col, row)), 1)
+        for obs, image in zip(obstacles, obstacle_images):
+            self.background.blit(image, self.tile_rect(obs))
+        self.redraw()
+
+    def redraw(self):
+        """Blit the whole background and flip, e.g. after an overlay"""
+        self.screen.blit(self.background, (0, 0))
+        pygame.display.flip()
+        self.drawn = {}
+
+    def draw(self, sprites):
+        """
+        Draw (image, [x, y]) sprites, updating only the tiles that changed.
+        Returns the list of dirty rectangles.
+        """
+        current = {}
+        for image, pos in sprites:
+            current[tuple(pos)] = image
+
+        changed = [pos for pos in self.drawn if pos not in current]
+        changed += [pos for pos, image in current.items() if self.drawn.get(pos) is not image]
+
+        dirty_rects = []
+        for pos in changed:
+            rect = self.tile_rect(pos)
+            self.screen.blit(self.background, rect, rect)
+            if pos in current:
+                self.screen.blit(current[pos], rect)
+            dirty_rects.append(rect)
+
+        self.drawn = current
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
+        return dirty_rects
@@ -0,0 +1,124 @@
+"""
+Nearest-neighbour search for the KNNClassifier of Loans.ipynb
+
+The notebook's classifier computes one np.linalg.norm per training row in
+Python and fully sorts the distances of every query. Here queries are
+handled in blocks:
+
+- "brute" ranks a block's training rows by |x|^2 - 2 q.x, one matrix
+  product plus one addition (|q|^2 does not change the ranking and is
+  only added for the k nearest, picked with argpartition). The block size is chosen so that the distance block
+  stays under memory_limit bytes.
+- "kd_tree" (scipy.spatial.cKDTree) and "ball_tree" (sklearn's BallTree)
+  build an index in fit and query it block by block. Both are imported
+  only when used.
+
+Blocks are spread over n_jobs threads: the matrix products and tree
+queries release the GIL, and threads share the training set instead of
+copying it to every worker.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ALGORITHMS = ("auto", "brute", "kd_tree", "ball_tree")
+
+
+class KNNClassifier:
+    """
+    Drop-in replacement for the notebook's KNNClassifier(k). Votes are
+    counted like Counter.most_common: among classes with the same count,
+    the one seen first among the sorted neighbours wins.
+    """
+
+    def __init__(self, k, algorithm="auto", n_jobs=1, memory_limit=64 * 2**20, leaf_size=40):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        self.k = k
+        self.algorithm = algorithm
+        self.n_jobs = n_jobs
+        self.memory_limit = memory_limit
+        self.leaf_size = leaf_size
+
+    def fit(self, X, y):
+        self.X_train = np.ascontiguousarray(X, dtype=np.float64)
+        self.classes_, self.y_codes = np.unique(np.asarray(y), return_inverse=True)
+        if self.k > len(self.X_train):
+            raise ValueError(f"k={self.k} is larger than the {len(self.X_train)} training samples")
+
+        self.algorithm_ = self.algorithm
+        if self.algorithm_ == "auto":
+            # Trees only pay off in few dimensions
+            self.algorithm_ = "kd_tree" if self.X_train.shape[1] <= 15 else "brute"
+        self.index = None
+        if self.algorithm_ == "brute":
+            self.sq_norms = np.einsum("ij,ij->i", self.X_train, self.X_train)
+            self.X_scaled = -2 * self.X_train
+        elif self.algorithm_ == "kd_tree":
+            from scipy.spatial import cKDTree
+            self.index = cKDTree(self.X_train, leafsize=self.leaf_size)
+        else:
+            from sklearn.neighbors import BallTree
+            self.index = BallTree(self.X_train, leaf_size=self.leaf_size)
+        return self
+
+    def block_size(self):
+        """Queries per block, so that one block's distance matrix fits in memory_limit"""
+        return max(1, self.memory_limit // (8 * len(self.X_train)))
+
+    def _brute_neighbors(self, Q):
+        distances = Q @ self.X_scaled.T
+        distances += self.sq_norms
+        k = self.k
+        if k < distances.shape[1]:
+            nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        else:
+            nearest = np.broadcast_to(np.arange(k), (len(Q), k))
+        nearest_distances = np.take_along_axis(distances, nearest, axis=1)
+        order = np.argsort(nearest_distances, axis=1, kind="stable")
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        nearest_distances = np.take_along_axis(nearest_distances, order, axis=1)
+        nearest_distances += np.einsum("ij,ij->i", Q, Q)[:, None]
+        # Rounding can make the expanded form slightly negative
+        return np.sqrt(np.maximum(nearest_distances, 0.0)), nearest
+
+    def _block_neighbors(self, Q):
+        if self.algorithm_ == "brute":
+            return self._brute_neighbors(Q)
+        if self.algorithm_ == "kd_tree":
+            distances, nearest = self.index.query(Q, k=self.k)
+            # cKDTree drops the neighbour axis when k == 1
+            return distances.reshape(len(Q), self.k), nearest.reshape(len(Q), self.k)
+        return self.index.query(Q, k=self.k)
+
+    def _map_blocks(self, function, X):
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        # Every thread holds one block, so the memory limit is shared between them
+        size = max(1, self.block_size() // max(1, self.n_jobs))
+        blocks = [X[start:start + size] for start in range(0, len(X), size)]
+        if self.n_jobs == 1 or len(blocks) == 1:
+            return [function(block) for block in blocks]
+        with ThreadPoolExecutor(self.n_jobs) as executor:
+            return list(executor.map(function, blocks))
+
+    def kneighbors(self, X):
+        """(distances, indices) of the k nearest training rows of every query, nearest first"""
+        results = self._map_blocks(self._block_neighbors, X)
+        return (np.concatenate([distances for distances, _ in results]),
+                np.concatenate([nearest for _, nearest in results]))
+
+    def _vote(self, Q):
+        labels = self.y_codes[self._block_neighbors(Q)[1]]
+        n_classes = len(self.classes_)
+        rows = np.arange(len(labels))
+        keys = rows[:, None] * n_classes + labels
+        counts = np.bincount(keys.ravel(), minlength=len(labels) * n_classes).reshape(-1, n_classes)
+        # Position of each class's nearest neighbour breaks ties, as in Counter.most_common
+        first = np.full((len(labels), n_classes), self.k, dtype=np.int64)
+        for position in range(self.k - 1, -1, -1):
+            first[rows, labels[:, position]] = position
+        return np.argmax(counts * (self.k + 1) - first, axis=1)
+
+    def predict(self, X):
+        return self.classes_[np.concatenate(self._map_blocks(self._vote, X))]
@@ -0,0 +1,130 @@
+"""
+Streaming, cached preprocessing for Loans.ipynb
+
+Does what the notebook's load_and_preprocess_data does, with less work:
+
+- Only the four feature columns and bad_loans are parsed, the features
+  straight into categorical dtype. The notebook reads every column and
+  keeps five.
+- Classes are balanced in one vectorised pass. A single random
+  permutation is stably grouped by class, and the first min_count rows
+  of each class are kept. This replaces groupby().apply(sample), which
+  the notebook runs twice.
+- Codes are assigned as LabelEncoder assigns them: sorted categories,
+  counting only the values left after balancing.
+- The split (70/15/15, random_state=42) and StandardScaler are the
+  notebook's.
+
+The resulting arrays are saved as an .npz file in .loans_cache/. The
+file name is a key built from the CSV's path, size and modification
+time, the seed and the settings. A rerun with an unchanged file only
+loads that .npz, and hashing the contents of a multi-GB export would
+itself cost seconds.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+FEATURES = ['grade', 'term', 'home_ownership', 'emp_length']
+TARGET = 'bad_loans'
+CACHE_DIR = ".loans_cache"
+
+
+def read_columns(path, features=FEATURES, target=TARGET):
+    """
+    The feature columns (categorical) and the target of a CSV, parsing
+    nothing else. The C parser converts block by block and merges the
+    categories, so only one block of raw strings is held at a time.
+    """
+    return pd.read_csv(path, usecols=features + [target],
+                       dtype={**{name: "category" for name in features}, target: np.float64})
+
+
+def balance_indices(y, rng):
+    """
+    Row indices with min_count randomly chosen rows of every class, grouped
+    by class in sorted class order like the notebook's groupby sample
+    """
+    permutation = rng.permutation(len(y))
+    classes, counts = np.unique(y, return_counts=True)
+    if len(classes) == 0 or counts.min() == 0:
+        raise ValueError("Every class needs at least one row")
+    min_count = counts.min()
+    # A stable sort of the shuffled labels keeps each class's rows in random order
+    grouped = permutation[np.argsort(y[permutation], kind="stable")]
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    return np.concatenate([grouped[start:start + min_count] for start in starts])
+
+
+def label_encode(column):
+    """LabelEncoder-style codes of a categorical column: only the values present, sorted"""
+    column = column.cat.remove_unused_categories()
+    categories = column.cat.categories
+    order = np.argsort(np.asarray(categories, dtype=str), kind="stable")
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    codes = column.cat.codes.to_numpy()
+    # Missing values get a code after every category
+    encoded = np.where(codes < 0, len(categories), rank[np.maximum(codes, 0)])
+    return encoded, [str(value) for value in np.asarray(categories)[order]]
+
+
+def split_and_scale(X, y, random_state=42):
+    """The notebook's 70/15/15 split and StandardScaler fitted on the training part"""
+    X_train, X_temp, y_train, y_temp = train_test_split(X, y, test_size=0.3, random_state=random_state)
+    X_val, X_test, y_val, y_test = train_test_split(X_temp, y_temp, test_size=0.5, random_state=random_state)
+    scaler = StandardScaler()
+    return (scaler.fit_transform(X_train), scaler.transform(X_val), scaler.transform(X_test),
+            y_train, y_val, y_test, scaler)
+
+
+def cache_key(path, seed, features, target, random_state):
+    stat = os.stat(path)
+    source = json.dumps([os.path.abspath(path), stat.st_size, stat.st_mtime_ns, seed, features, target,
+                         random_state])
+    return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+
+def preprocess(path, seed=0, features=FEATURES, target=TARGET, random_state=42, cache_dir=None, use_cache=True):
+    """
+    Returns (X_train, X_val, X_test, y_train, y_val, y_test, columns) in
+    the order of the notebook's load_and_preprocess_data, with y as
+    integer arrays. seed fixes the class balancing (the notebook's
+    sampling is unseeded); random_state is the split's.
+    """
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    cache_path = os.path.join(cache_dir, f"{stem}-{cache_key(path, seed, features, target, random_state)}.npz")
+    if use_cache and os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            return (cached["X_train"], cached["X_val"], cached["X_test"], cached["y_train"],
+                    cached["y_val"], cached["y_test"], list(cached["columns"]))
+
+    data = read_columns(path, features, target)
+    y_all = data[target].to_numpy()
+    if np.isnan(y_all).all():
+        raise ValueError(f"'{target}' column is empty")
+    known = np.flatnonzero(~np.isnan(y_all))
+    rows = known[balance_indices(y_all[known], np.random.default_rng(seed))]
+    balanced = data.iloc[rows]
+
+    encoded, categories = zip(*(label_encode(balanced[name]) for name in features))
+    X = np.column_stack(encoded).astype(np.float64)
+    y = balanced[target].to_numpy().astype(np.int64)
+    X_train, X_val, X_test, y_train, y_val, y_test, scaler = split_and_scale(X, y, random_state)
+
+    if use_cache:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = cache_path[:-4] + ".tmp.npz"
+        np.savez(tmp_path, X_train=X_train, X_val=X_val, X_test=X_test, y_train=y_train, y_val=y_val,
+                 y_test=y_test, columns=np.array(features), scaler_mean=scaler.mean_, scaler_scale=scaler.scale_,
+                 categories=np.array(json.dumps(dict(zip(features, categories)))))
+        # Only a complete file is ever found under the cache name
+        os.replace(tmp_path, cache_path)
+    return X_train, X_val, X_test, y_train, y_val, y_test, list(features)
@@ -0,0 +1,215 @@
+"""
+Parallel model selection and comparison for Loans.ipynb
+
+main() in the notebook runs three GridSearchCV searches and then four
+trainings one after another. Here every (model family, parameter
+setting, CV fold) fit is one task in a single process pool:
+
+- The training set and a per-row fold number are copied once into shared
+  memory. Every family is therefore scored on the same folds: the
+  StratifiedKFold(5) that GridSearchCV(cv=5) uses.
+- Tasks are queued most expensive first, so the wall time is bounded by
+  the slowest fits rather than by the sum of all searches.
+- Fold scores and the refitted best models are pickled in
+  .model_cache/, keyed by a hash of the data, the family, its estimator
+  class and fixed parameters, the searched parameters, the fold and the
+  scikit-learn version. A rerun only refits what changed.
+
+plot_comparison() draws the notebook's test-accuracy bar chart from the
+result.
+"""
+
+import hashlib
+import itertools
+import os
+import pickle
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import sklearn
+from sklearn.ensemble import AdaBoostClassifier, RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+try:
+    from shared_arrays import attach, shared_arrays
+except ImportError:
+    # Run from this directory (next to the notebook); the helper lives one level up
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from shared_arrays import attach, shared_arrays
+
+CACHE_DIR = ".model_cache"
+
+# family: (estimator class, parameter grid, fixed parameters), the grids of the notebook's main().
+# Tree-based models get a fixed random_state so cached scores are reproducible.
+FAMILIES = {
+    "Decision Tree": (DecisionTreeClassifier, {"max_depth": [3, 5, 7, 9, None]}, {"random_state": 42}),
+    "KNN": (KNeighborsClassifier, {"n_neighbors": [3, 5, 7, 9, 11]}, {}),
+    "Adaboost": (AdaBoostClassifier, {"n_estimators": [50, 100, 150, 200],
+                                      "learning_rate": [0.01, 0.1, 1, 10]}, {"random_state": 42}),
+    "Random Forest": (RandomForestClassifier, {"n_estimators": [100], "max_depth": [10]}, {"random_state": 42}),
+}
+
+# Arrays attached by each worker in _init_worker
+_shared = {}
+
+
+def _init_worker(specs, families, cache_dir):
+    """Pool initializer: map the shared arrays"""
+    _shared.update(attach(specs))
+    _shared["families"] = families
+    _shared["cache_dir"] = cache_dir
+
+
+def parameter_grid(grid):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+
+def _cost(family, params):
+    """Rough relative cost of a fit, used to start the slowest tasks first"""
+    return params.get("n_estimators", 1) * (10 if family == "Random Forest" else 1)
+
+
+def _cache_path(cache_dir, data_key, family, estimator, fixed, params, fold):
+    source = repr((data_key, family, estimator.__name__, sorted(fixed.items()), sorted(params.items()), fold,
+                   sklearn.__version__))
+    return os.path.join(cache_dir, hashlib.sha256(source.encode()).hexdigest()[:24] + ".pkl")
+
+
+def _run(task):
+    """Score one setting on one fold (fold >= 0) or refit it on all the training data (fold = -1)"""
+    family, params, fold, data_key = task
+    cache_dir = _shared["cache_dir"]
+    estimator, _, fixed = _shared["families"][family]
+    path = _cache_path(cache_dir, data_key, family, estimator, fixed, params, fold) if cache_dir else None
+    if path and os.path.exists(path):
+        with open(path, "rb") as f:
+            return (family, params, fold) + pickle.load(f) + (True,)
+
+    X, y, folds = _shared["X"], _shared["y"], _shared["folds"]
+    model = estimator(**fixed, **params)
+    start = time.perf_counter()
+    if fold >= 0:
+        train = folds != fold
+        model.fit(X[train], y[train])
+        result = (float(np.mean(model.predict(X[~train]) == y[~train])), time.perf_counter() - start)
+    else:
+        model.fit(X, y)
+        result = (model, time.perf_counter() - start)
+    if path:
+        # Written to a temporary name first so a half-written file is never read
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(result, f)
+        os.replace(path + ".tmp", path)
+    return (family, params, fold) + result + (False,)
+
+
+def _fold_numbers(y, n_folds):
+    """Validation fold of every row, as StratifiedKFold(n_folds) (GridSearchCV's cv=n) splits them"""
+    folds = np.empty(len(y), dtype=np.int8)
+    for fold, (_, validation) in enumerate(StratifiedKFold(n_folds).split(np.zeros(len(y)), y)):
+        folds[validation] = fold
+    return folds
+
+
+def compare(X_train, y_train, X_test, y_test, families=None, n_folds=5, workers=None, cache_dir=CACHE_DIR,
+            verbose=True):
+    """
+    Grid-search every family with shared CV folds, refit each family's best
+    setting on the whole training set and score it on the test set.
+    Returns ({family: {"best_params", "cv_score", "cv_results", "model",
+    "test_accuracy"}}, {"tasks", "cached", "fit_seconds", "wall_seconds"}).
+    fit_seconds only counts the fits run by this call, not cached ones.
+    cache_dir=None disables the cache.
+    """
+    families = families or FAMILIES
+    X = np.ascontiguousarray(X_train, dtype=np.float64)
+    y = np.ascontiguousarray(y_train)
+    folds = _fold_numbers(y, n_folds)
+    data_key = hashlib.sha256(X.tobytes() + y.tobytes() + folds.tobytes()).hexdigest()
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    tasks = [(family, params, fold, data_key)
+             for family, (_, grid, _) in families.items()
+             for params in parameter_grid(grid)
+             for fold in range(n_folds)]
+    tasks.sort(key=lambda task: -_cost(task[0], task[1]))
+
+    start = time.perf_counter()
+    scores = {}
+    fit_seconds, cached = 0.0, 0
+    with shared_arrays({"X": X, "y": y, "folds": folds}) as specs, \
+            Pool(workers, initializer=_init_worker, initargs=(specs, families, cache_dir)) as pool:
+        for family, params, fold, score, seconds, hit in pool.imap_unordered(_run, tasks):
+            scores.setdefault((family, tuple(sorted(params.items()))), {})[fold] = score
+            fit_seconds += 0.0 if hit else seconds
+            cached += hit
+
+        results = {}
+        for family, (_, grid, _) in families.items():
+            cv_results = []
+            for params in parameter_grid(grid):
+                fold_scores = scores[(family, tuple(sorted(params.items())))]
+                fold_scores = [fold_scores[fold] for fold in range(n_folds)]
+                cv_results.append({"params": params, "mean": float(np.mean(fold_scores)),
+                                   "std": float(np.std(fold_scores)), "fold_scores": fold_scores})
+            # Like GridSearchCV, the first setting with the best mean score wins
+            best = max(cv_results, key=lambda row: row["mean"])
+            results[family] = {"best_params": best["params"], "cv_score": best["mean"], "cv_results": cv_results}
+
+        refits = [(family, results[family]["best_params"], -1, data_key) for family in families]
+        for family, params, _, model, seconds, hit in pool.imap_unordered(_run, refits):
+            results[family]["model"] = model
+            fit_seconds += 0.0 if hit else seconds
+            cached += hit
+
+    for family, result in results.items():
+        result["test_accuracy"] = float(np.mean(result["model"].predict(X_test) == np.asarray(y_test)))
+        if verbose:
+            print(f"{family:>14}: best {result['best_params']}, CV accuracy {result['cv_score']:.4f}, "
+                  f"test accuracy {result['test_accuracy']:.4f}")
+    elapsed = time.perf_counter() - start
+    stats = {"tasks": len(tasks) + len(families), "cached": cached,
+             "fit_seconds": fit_seconds, "wall_seconds": elapsed}
+    if verbose:
+        print(f"{len(tasks) + len(families)} fits ({cached} from cache): {fit_seconds:.1f}s of fitting "
+              f"in {elapsed:.1f}s wall time")
+    return results, stats
+
+
+def plot_comparison(results):
+    """The notebook's test-accuracy bar chart, for every family in results"""
+    import matplotlib.pyplot as plt
+
+    models = list(results)
+    accuracies = [results[family]["test_accuracy"] for family in models]
+    plt.figure(figsize=(8, 6))
+    plt.bar(models, accuracies)
+    plt.title('Model Comparison - Test Accuracy')
+    plt.ylabel('Accuracy')
+    plt.ylim(0, 1)
+    for i, v in enumerate(accuracies):
+        plt.text(i, v + 0.01, f'{v:.4f}', ha='center')
+    plt.show()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from loans_data import preprocess
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("csv", nargs="?", default="loan_sub.csv")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0, help="class balancing seed")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    X_train, X_val, X_test, y_train, y_val, y_test, columns = preprocess(args.csv, seed=args.seed)
+    compare(X_train, y_train, X_test, y_test, workers=args.workers,
+            cache_dir=None if args.no_cache else CACHE_DIR)
@@ -0,0 +1,329 @@
+"""
+Histogram-based split search for the multiway DecisionTreeClassifier of
+WS1_DT.ipynb.
+
+Every feature is binned once (exactly, when it has at most max_bins
+distinct values). A node then builds one class-count histogram per feature
+from the row indices it owns, and every candidate split is scored from
+cumulative counts: no rows are copied and no impurity is recomputed from
+raw labels. Multiway splits (up to num_splits children) are found by
+dynamic programming over the histogram bins instead of enumerating
+threshold combinations.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+# Gains at or below this are rounding noise, not real splits
+MIN_GAIN = 1e-12
+
+
+class Node:
+    __slots__ = ("feature_index", "thresholds", "children", "info_gain", "value", "majority")
+
+    def __init__(self, feature_index=None, thresholds=None, children=None, info_gain=None, value=None,
+                 majority=None):
+        self.feature_index = feature_index
+        self.thresholds = thresholds
+        self.children = children
+        self.info_gain = info_gain
+        self.value = value
+        # Most common class of the node's training rows, kept on decision
+        # nodes too so the tree can be cut at any depth
+        self.majority = value if majority is None else majority
+
+
+def bin_features(X, max_bins=255):
+    """
+    Bin every column of X once. Returns (codes, bin_upper): codes[i, f] is
+    the bin of X[i, f], and bin_upper[f][k] is the threshold that puts bin k
+    and all lower bins on the left (value <= threshold) of a split.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    codes = np.empty(X.shape, dtype=np.uint8 if max_bins <= 256 else np.uint16)
+    bin_upper = []
+    for f in range(X.shape[1]):
+        column = X[:, f]
+        uniques = np.unique(column)
+        if len(uniques) > max_bins:
+            # Quantile bins, each labelled with the largest value it holds
+            edges = np.unique(np.quantile(uniques, np.linspace(0, 1, max_bins + 1)[1:-1]))
+            uniques = np.append(edges, uniques[-1])
+        codes[:, f] = np.searchsorted(uniques, column, side="left")
+        bin_upper.append(uniques)
+    return codes, bin_upper
+
+
+def impurity(counts, criterion="entropy"):
+    """Entropy (bits) or Gini index of every row of class counts"""
+    counts = np.asarray(counts, dtype=np.float64)
+    totals = counts.sum(axis=-1, keepdims=True)
+    p = counts / np.maximum(totals, 1)
+    if criterion == "gini":
+        return 1 - (p ** 2).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return -np.where(p > 0, p * np.log2(p), 0.0).sum(axis=-1)
+
+
+@lru_cache(maxsize=None)
+def _not_segment(n_groups):
+    """Mask of (a, b) pairs with b <= a, which are not segments"""
+    return np.tril(np.ones((n_groups + 1, n_groups + 1), dtype=bool))
+
+
+def best_multiway_split(group_counts, max_children, criterion="entropy"):
+    """
+    Best partition of consecutive groups (rows of class counts, all
+    non-empty) into 2..max_children segments, minimising the
+    size-weighted child impurity. Returns (weighted impurity, boundaries),
+    where boundaries are the group indices at which each later segment
+    starts, or None if fewer than 2 groups.
+    """
+    n_groups = len(group_counts)
+    if n_groups < 2 or max_children < 2:
+        return None
+    prefix = np.zeros((n_groups + 1, group_counts.shape[1]))
+    np.cumsum(group_counts, axis=0, out=prefix[1:])
+
+    # cost[a, b]: weighted impurity of one segment holding groups a..b-1
+    segment = prefix[None, :, :] - prefix[:, None, :]
+    cost = segment.sum(axis=2) * impurity(segment, criterion)
+    cost[_not_segment(n_groups)] = np.inf
+
+    # best[b]: lowest cost of covering groups 0..b-1 with m segments
+    best = cost[0]
+    choices = []
+    best_total, best_segments = np.inf, 0
+    for segments in range(2, min(max_children, n_groups) + 1):
+        total = best[:, None] + cost
+        previous = np.argmin(total, axis=0)
+        best = total[previous, np.arange(n_groups + 1)]
+        choices.append(previous)
+        # Strictly better only, so fewer children win ties
+        if best[n_groups] < best_total - MIN_GAIN:
+            best_total, best_segments = best[n_groups], segments
+
+    boundaries = []
+    end = n_groups
+    for previous in reversed(choices[:best_segments - 1]):
+        end = previous[end]
+        boundaries.append(int(end))
+    return best_total, boundaries[::-1]
+
+
+class DecisionTreeClassifier:
+    """
+    Same parameters and tree (Node objects) as the notebook's classifier.
+    As there, a node at depth d is split while d <= max_depth.
+
+    candidates="all" tries every bin boundary of a feature. "quantile"
+    reproduces the notebook's candidate thresholds (the quantiles of the
+    node's unique values when there are more than num_splits of them), which
+    gives the same trees as the notebook when every feature has at most
+    max_bins distinct values.
+    """
+
+    def __init__(self, min_sample_split=2, max_depth=2, num_splits=3, criterion="entropy",
+                 candidates="all", max_bins=255):
+        if candidates not in ("all", "quantile"):
+            raise ValueError(f"Unknown candidates mode: {candidates}")
+        self.root = None
+        self.min_sample_split = min_sample_split
+        self.max_depth = max_depth
+        self.num_splits = num_splits
+        self.criterion = criterion
+        self.candidates = candidates
+        self.max_bins = max_bins
+        self.feature_names = None
+
+    def fit(self, X, Y):
+        if hasattr(X, "columns"):
+            self.feature_names = list(X.columns)
+        else:
+            self.feature_names = [f"Feature_{i}" for i in range(np.shape(X)[1])]
+        X = np.asarray(X, dtype=np.float64)
+        classes, y_codes = np.unique(np.asarray(Y), return_inverse=True)
+        codes, bin_upper = bin_features(X, self.max_bins)
+        return self.fit_binned(codes, bin_upper, y_codes, classes)
+
+    def fit_binned(self, codes, bin_upper, y_codes, classes):
+        """Fit on data already binned by bin_features, with labels encoded as indices into classes"""
+        if self.feature_names is None:
+            self.feature_names = [f"Feature_{i}" for i in range(codes.shape[1])]
+        self.codes, self.bin_upper = codes, bin_upper
+        self.classes_, self.y_codes = np.asarray(classes), np.asarray(y_codes)
+        self.n_classes = len(self.classes_)
+        n_bins = np.array([len(upper) for upper in self.bin_upper])
+        self.bin_offsets = np.concatenate([[0], np.cumsum(n_bins)])
+
+        # Every node owns a contiguous slice of this one index buffer; splitting
+        # a node reorders its slice in place so each child's rows are contiguous
+        self.sample_index = np.arange(len(codes), dtype=np.int32)
+        self.root = self.build_tree(0, len(codes))
+        self.compile()
+        return self
+
+    def histograms(self, idx):
+        """(total bins, n_classes) class counts of the rows idx, for every feature at once"""
+        keys = (self.codes[idx] + self.bin_offsets[:-1]) * self.n_classes + self.y_codes[idx, None]
+        size = self.bin_offsets[-1] * self.n_classes
+        return np.bincount(keys.ravel(), minlength=size).reshape(-1, self.n_classes)
+
+    def build_tree(self, start, end, curr_depth=0, hist=None):
+        """Grow the subtree over sample_index[start:end]; hist is its histogram if already known"""
+        idx = self.sample_index[start:end]
+        class_counts = np.bincount(self.y_codes[idx], minlength=self.n_classes)
+        if end - start >= self.min_sample_split and curr_depth <= self.max_depth:
+            if hist is None:
+                hist = self.histograms(idx)
+            best_split = self.get_best_split(hist, class_counts)
+            if best_split is not None and best_split["info_gain"] > MIN_GAIN:
+                feature_index = best_split["feature_index"]
+                n_children = len(best_split["thresholds"]) + 1
+                child_of_row = best_split["child_of_bin"][self.codes[idx, feature_index]]
+                idx[:] = idx[np.argsort(child_of_row, kind="stable")]
+                bounds = start + np.concatenate([[0], np.cumsum(np.bincount(child_of_row, minlength=n_children))])
+
+                # Histogram the smaller children; the largest one is the parent minus the rest
+                sizes = np.diff(bounds)
+                largest = int(np.argmax(sizes))
+                child_hists = [None] * n_children
+                if curr_depth < self.max_depth and sizes[largest] >= self.min_sample_split:
+                    remainder = hist.copy()
+                    for child in range(n_children):
+                        if child != largest:
+                            child_hists[child] = self.histograms(self.sample_index[bounds[child]:bounds[child + 1]])
+                            remainder -= child_hists[child]
+                    child_hists[largest] = remainder
+
+                children = [self.build_tree(bounds[child], bounds[child + 1], curr_depth + 1, child_hists[child])
+                            for child in range(n_children)]
+                return Node(feature_index=feature_index, thresholds=best_split["thresholds"],
+                            children=children, info_gain=best_split["info_gain"],
+                            majority=self.classes_[np.argmax(class_counts)])
+        return Node(value=self.classes_[np.argmax(class_counts)])
+
+    def get_best_split(self, hist, class_counts):
+        parent_impurity = impurity(class_counts, self.criterion)
+        num_samples = class_counts.sum()
+        best_split = None
+
+        for feature_index, upper in enumerate(self.bin_upper):
+            bins = hist[self.bin_offsets[feature_index]:self.bin_offsets[feature_index + 1]]
+            occupied = np.flatnonzero(bins.any(axis=1))
+            if len(occupied) < 2:
+                continue
+
+            # Group the occupied bins by candidate threshold
+            values = upper[occupied]
+            if self.candidates == "quantile" and len(values) > self.num_splits:
+                thresholds = np.quantile(values, np.linspace(0, 1, self.num_splits + 1)[1:-1])
+                group_of_bin = np.searchsorted(thresholds, values, side="left")
+                groups, starts = np.unique(group_of_bin, return_index=True)
+                group_counts = np.add.reduceat(bins[occupied], starts, axis=0)
+            else:
+                # Every occupied bin is its own group
+                thresholds, groups, group_counts = values, np.arange(len(values)), bins[occupied]
+
+            result = best_multiway_split(group_counts, self.num_splits, self.criterion)
+            if result is None:
+                continue
+            weighted_impurity, boundaries = result
+            info_gain = parent_impurity - weighted_impurity / num_samples
+            if best_split is None or info_gain > best_split["info_gain"]:
+                # A boundary before group g splits at the threshold of group g - 1
+                split_thresholds = [float(thresholds[groups[g - 1]]) for g in boundaries]
+                child_of_bin = np.searchsorted(split_thresholds, upper, side="left")
+                best_split = {"feature_index": feature_index, "thresholds": split_thresholds,
+                              "info_gain": float(info_gain), "child_of_bin": child_of_bin}
+        return best_split
+
+    def compile(self):
+        """
+        Flatten the tree into arrays in breadth-first order, so the children
+        of node i are nodes first_child[i] .. first_child[i] + n_children - 1.
+        node_thresholds[j] holds the j-th threshold of every node, padded
+        with +inf. A leaf points to itself with feature 0 and only +inf
+        thresholds, so rows that reach it stay put on later levels; its
+        node_value holds every node's majority class index and node_depth
+        its depth, for predictions from a tree cut at a smaller depth.
+        """
+        nodes, depths = [self.root], [0]
+        for node, depth in zip(nodes, depths):
+            if node.value is None:
+                nodes.extend(node.children)
+                depths.extend([depth + 1] * len(node.children))
+        n_nodes = len(nodes)
+        width = max([len(node.thresholds) for node in nodes if node.value is None] + [1])
+
+        self.depth = max(depths)
+        self.node_depth = np.array(depths, dtype=np.int32)
+        self.node_feature = np.zeros(n_nodes, dtype=np.intp)
+        self.node_thresholds = np.full((width, n_nodes), np.inf)
+        self.node_first_child = np.arange(n_nodes, dtype=np.intp)
+        self.node_value = np.searchsorted(self.classes_, [node.majority for node in nodes])
+        next_child = 1
+        for i, node in enumerate(nodes):
+            if node.value is None:
+                self.node_feature[i] = node.feature_index
+                self.node_thresholds[:len(node.thresholds), i] = node.thresholds
+                self.node_first_child[i] = next_child
+                next_child += len(node.children)
+
+    def apply(self, X, max_depth=None, batch_size=65536):
+        """
+        Compiled index of the leaf reached by every row. Rows are routed in
+        batches, all rows of a batch moving down one level per step. With
+        max_depth, routing stops where a tree fit with that max_depth
+        would have its deepest leaves.
+        """
+        levels = self.depth if max_depth is None else min(self.depth, max_depth + 1)
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        leaves = np.empty(n_rows, dtype=np.intp)
+        for start in range(0, n_rows, batch_size):
+            stop = min(start + batch_size, n_rows)
+            row_offsets = np.arange(start, stop) * n_features
+            node = np.zeros(stop - start, dtype=np.intp)
+            for _ in range(levels):
+                values = flat_X.take(row_offsets + self.node_feature.take(node))
+                # Child k holds values in (threshold[k - 1], threshold[k]]
+                child = self.node_first_child.take(node)
+                for thresholds in self.node_thresholds:
+                    child += values > thresholds.take(node)
+                node = child
+            leaves[start:stop] = node
+        return leaves
+
+    def predict(self, X, max_depth=None):
+        return self.classes_[self.node_value[self.apply(X, max_depth)]]
+
+    def node_count(self, max_depth=None):
+        """Number of nodes, or of nodes kept when the tree is cut for max_depth"""
+        if max_depth is None:
+            return len(self.node_depth)
+        return int((self.node_depth <= max_depth + 1).sum())
+
+    def make_prediction(self, x, tree):
+        while tree.value is None:
+            feature_val = x[tree.feature_index]
+            for i, threshold in enumerate(tree.thresholds):
+                if feature_val <= threshold:
+                    tree = tree.children[i]
+                    break
+            else:
+                tree = tree.children[-1]
+        return tree.value
+
+    def print_tree(self, tree=None, indent=""):
+        if tree is None:
+            tree = self.root
+        if tree.value is not None:
+            print(f"{indent}Predict: {tree.value}")
+            return
+        feature_name = self.feature_names[tree.feature_index]
+        print(f"{indent}{feature_name} with thresholds {tree.thresholds} (gain: {tree.info_gain:.4f})")
+        for child in tree.children:
+            self.print_tree(child, indent + "│   ")
@@ -0,0 +1,171 @@
+"""
+Parallel hyperparameter sweep for the fast_tree DecisionTreeClassifier
+
+Replaces the scikit-learn max_depth x min_samples_split loop at the end
+of WS1_DT.ipynb's comparison cell (hyperparameter_tuning.png) with a
+fast_tree grid of max_depth x num_splits x criterion x min_sample_split.
+min_sample_split is the same rule as scikit-learn's min_samples_split (a
+node of at least that many samples may split), but fast_tree's
+max_depth=d splits nodes at depths 0..d, like scikit-learn's
+max_depth=d + 1. So the old grid is max_depths=[d - 1 for d in depths],
+min_sample_splits=min_samples, num_splits=(2,), criteria=("gini",).
+
+Two things keep it cheap:
+
+- One tree per (num_splits, criterion, min_sample_split) is grown to the
+  largest max_depth and scored cut at every smaller depth. A node at depth
+  k is split iff k <= max_depth, so the cut tree is exactly the tree a fit
+  with that max_depth would grow.
+- The data is binned once in the parent and placed in shared memory.
+  Workers attach to those blocks when the pool starts, so the training
+  set is never pickled per task.
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from fast_tree import DecisionTreeClassifier, bin_features
+
+try:
+    from shared_arrays import attach, shared_arrays
+except ImportError:
+    # Run from this directory (next to the notebook); the helper lives one level up
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from shared_arrays import attach, shared_arrays
+
+# Arrays attached by each worker in _init_worker
+_shared = {}
+
+
+def _init_worker(specs, extra):
+    """Pool initializer: map the shared arrays"""
+    _shared.update(attach(specs))
+    _shared.update(extra)
+
+
+def _evaluate(task):
+    """Fit one deep tree and score it at every depth of the grid"""
+    num_splits, criterion, min_sample_split, depths = task
+    start = time.perf_counter()
+    tree = DecisionTreeClassifier(min_sample_split=min_sample_split, max_depth=max(depths),
+                                  num_splits=num_splits, criterion=criterion,
+                                  candidates=_shared["candidates"], max_bins=_shared["max_bins"])
+    tree.fit_binned(_shared["codes"], _shared["bin_upper"], _shared["y_train"], _shared["classes"])
+    fit_time = time.perf_counter() - start
+
+    rows = []
+    for depth in depths:
+        # Compared as class indices, so labels need not live in shared memory
+        train_pred = tree.node_value[tree.apply(_shared["X_train"], depth)]
+        test_pred = tree.node_value[tree.apply(_shared["X_test"], depth)]
+        rows.append({"max_depth": depth, "num_splits": num_splits, "criterion": criterion,
+                     "min_sample_split": min_sample_split,
+                     "train_accuracy": float(np.mean(train_pred == _shared["y_train"])),
+                     "test_accuracy": float(np.mean(test_pred == _shared["y_test"])),
+                     "nodes": tree.node_count(depth), "fit_time": fit_time})
+    return rows
+
+
+def sweep(X_train, y_train, X_test, y_test, max_depths=range(1, 11), num_splits=(2, 3, 4),
+          criteria=("entropy", "gini"), min_sample_splits=(2,), candidates="all", max_bins=255,
+          workers=None):
+    """
+    Accuracy of every grid point. Returns one dict per (max_depth,
+    num_splits, criterion, min_sample_split); fit_time is the time of the
+    shared deep fit. workers=1 runs in this process.
+    """
+    X_train = np.asarray(X_train, dtype=np.float64)
+    X_test = np.asarray(X_test, dtype=np.float64)
+    classes, y_train_codes = np.unique(np.asarray(y_train), return_inverse=True)
+    # Test labels never seen in training get -1 and always count as wrong
+    y_test = np.asarray(y_test)
+    y_test_codes = np.minimum(np.searchsorted(classes, y_test), len(classes) - 1)
+    y_test_codes[classes[y_test_codes] != y_test] = -1
+    codes, bin_upper = bin_features(X_train, max_bins)
+
+    depths = sorted(max_depths)
+    tasks = [(splits, criterion, min_split, depths) for splits, criterion, min_split
+             in itertools.product(num_splits, criteria, min_sample_splits)]
+    arrays = {"codes": codes, "y_train": y_train_codes, "X_train": X_train,
+              "X_test": X_test, "y_test": y_test_codes}
+    extra = {"bin_upper": bin_upper, "classes": classes, "candidates": candidates, "max_bins": max_bins}
+
+    if workers == 1:
+        _shared.clear()
+        _shared.update(arrays)
+        _shared.update(extra)
+        try:
+            return [row for task in tasks for row in _evaluate(task)]
+        finally:
+            _shared.clear()
+
+    with shared_arrays(arrays) as specs, Pool(workers, initializer=_init_worker, initargs=(specs, extra)) as pool:
+        results = pool.map(_evaluate, tasks, chunksize=1)
+    return [row for rows in results for row in rows]
+
+
+def best(rows, key="test_accuracy"):
+    return max(rows, key=lambda row: row[key])
+
+
+def print_sweep(rows):
+    print(f"{'depth':>5} {'splits':>6} {'criterion':>9} {'min split':>9} {'train':>7} {'test':>7} {'nodes':>6}")
+    for row in sorted(rows, key=lambda r: (r["criterion"], r["num_splits"], r["min_sample_split"], r["max_depth"])):
+        print(f"{row['max_depth']:>5} {row['num_splits']:>6} {row['criterion']:>9} {row['min_sample_split']:>9} "
+              f"{row['train_accuracy']:>7.4f} {row['test_accuracy']:>7.4f} {row['nodes']:>6}")
+
+
+def plot_sweep(rows, filename=None):
+    """Test accuracy against max_depth, one line per (num_splits, criterion, min_sample_split)"""
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(12, 6))
+    for splits, criterion, min_split in dict.fromkeys(
+            (r["num_splits"], r["criterion"], r["min_sample_split"]) for r in rows):
+        points = sorted((r["max_depth"], r["test_accuracy"]) for r in rows
+                        if (r["num_splits"], r["criterion"], r["min_sample_split"]) == (splits, criterion, min_split))
+        plt.plot(*zip(*points), marker='o', label=f"{criterion}, {splits} splits, min split {min_split}")
+    plt.xlabel('Max Depth')
+    plt.ylabel('Test Accuracy')
+    plt.title('Hyperparameter Tuning Results')
+    plt.grid(True)
+    plt.legend()
+    if filename:
+        plt.savefig(filename)
+    plt.show()
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("csv", help="CSV file with a target column")
+    parser.add_argument("--target", default="satisfaction")
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--max-depth", type=int, default=10)
+    parser.add_argument("--num-splits", type=int, nargs="+", default=[2, 3, 4])
+    parser.add_argument("--criteria", nargs="+", default=["entropy", "gini"])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.csv)
+    y = data.pop(args.target).to_numpy()
+    X = data.select_dtypes("number").fillna(0).to_numpy()
+    order = np.random.default_rng(args.seed).permutation(len(X))
+    n_test = int(len(X) * args.test_size)
+    test, train = order[:n_test], order[n_test:]
+
+    start = time.perf_counter()
+    rows = sweep(X[train], y[train], X[test], y[test], range(1, args.max_depth + 1),
+                 args.num_splits, args.criteria, workers=args.workers)
+    print_sweep(rows)
+    top = best(rows)
+    print(f"Best: max_depth={top['max_depth']} num_splits={top['num_splits']} criterion={top['criterion']} "
+          f"test accuracy {top['test_accuracy']:.4f} ({time.perf_counter() - start:.1f}s for {len(rows)} grid points)")
@@ -0,0 +1,295 @@
+"""
+Bulk KenKen generation and solving pipeline
+
+Generates puzzles with unique solutions across a process pool, streams them
+to a compact binary file and reports per-size generation and solve timings.
+
+    python kenken_pipeline.py --sizes 4 6 9 --count 1000 --out puzzles.kkn
+    python kenken_pipeline.py --sizes 9 --count 10 --timing
+
+File format: the 4-byte magic b"KKN1", then one record per puzzle:
+    uint8 size, uint8 number of cages,
+    size * size uint8 solution values (row-major),
+    per cage: uint8 operation index into "+-*/", uint32 target,
+              uint8 cell count, that many uint8 cell indices (row * size + col)
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import struct
+import time
+from collections import namedtuple
+
+from kenken_solver import KenKenSolver, cage_value_ok, max_cage_cells
+
+MAGIC = b"KKN1"
+OPERATIONS = "+-*/"
+
+Cage = namedtuple("Cage", ["cells", "operation", "target"])
+Puzzle = namedtuple("Puzzle", ["size", "solution", "cages"])
+
+
+def random_latin_square(size, rng, steps=None):
+    """
+    Uniformly random Latin square, by a Jacobson-Matthews walk from a
+    cyclic square. The walk moves through the incidence cube
+    (cube[r][c][s - 1] == 1 when cell (r, c) holds s) and may pass through
+    "improper" squares with one -1 entry. Only the `steps` proper squares
+    it lands on (size ** 3 by default) are counted: stopping at the first
+    proper square after a fixed number of moves would favour some squares.
+    Unlike shuffling a cyclic square, it reaches every square.
+    """
+    n = size
+    cube = [[[int((r + c) % n == s) for s in range(n)] for c in range(n)] for r in range(n)]
+    steps = n ** 3 if steps is None else steps
+    improper = None
+    proper_steps = 0
+    # A 1x1 cube has no empty entry to start from
+    while n > 1 and proper_steps < steps:
+        if improper is None:
+            # A random empty (row, column, symbol) and the 1s on its three lines
+            while True:
+                r, c, s = rng.randrange(n), rng.randrange(n), rng.randrange(n)
+                if not cube[r][c][s]:
+                    break
+            s2 = cube[r][c].index(1)
+            r2 = next(x for x in range(n) if cube[x][c][s] == 1)
+            c2 = next(x for x in range(n) if cube[r][x][s] == 1)
+        else:
+            # From the -1 entry each line has two 1s; take one at random
+            r, c, s = improper
+            s2 = rng.choice([x for x in range(n) if cube[r][c][x] == 1])
+            r2 = rng.choice([x for x in range(n) if cube[x][c][s] == 1])
+            c2 = rng.choice([x for x in range(n) if cube[r][x][s] == 1])
+        cube[r][c][s] += 1
+        cube[r][c][s2] -= 1
+        cube[r][c2][s] -= 1
+        cube[r2][c][s] -= 1
+        cube[r][c2][s2] += 1
+        cube[r2][c][s2] += 1
+        cube[r2][c2][s] += 1
+        cube[r2][c2][s2] -= 1
+        improper = (r2, c2, s2) if cube[r2][c2][s2] < 0 else None
+        proper_steps += improper is None
+    return [[cube[r][c].index(1) + 1 for c in range(n)] for r in range(n)]
+
+
+def random_cages(grid, size, rng, max_cage_size):
+    """Grow random cages over the grid, like the notebook's generate_random_cages"""
+    cages = []
+    visited = [[False] * size for _ in range(size)]
+    for i in range(size):
+        for j in range(size):
+            if visited[i][j]:
+                continue
+            cage_size = rng.randint(1, min(size, max_cage_size))
+            cells = [(i, j)]
+            visited[i][j] = True
+            while len(cells) < cage_size:
+                x, y = cells[-1]
+                neighbors = [(x + dx, y + dy) for dx, dy in [(1, 0), (0, 1), (-1, 0), (0, -1)]
+                             if 0 <= x + dx < size and 0 <= y + dy < size and not visited[x + dx][y + dy]]
+                if not neighbors:
+                    break
+                next_cell = rng.choice(neighbors)
+                cells.append(next_cell)
+                visited[next_cell[0]][next_cell[1]] = True
+
+            values = [grid[x][y] for x, y in cells]
+            if len(cells) > 2:
+                operation = rng.choice(['+', '*'])
+            elif len(cells) == 2 and max(values) % min(values) == 0:
+                operation = rng.choice(['+', '-', '*', '/'])
+            else:
+                operation = rng.choice(['+', '-', '*'])
+            cages.append(Cage(cells, operation, cage_target(operation, values)))
+    return cages
+
+
+def cage_target(operation, values):
+    """Target of a cage holding `values`"""
+    if len(values) == 1:
+        return values[0]
+    if operation == '+':
+        return sum(values)
+    elif operation == '-':
+        return abs(values[0] - values[1])
+    elif operation == '*':
+        product = 1
+        for v in values:
+            product *= v
+        return product
+    return max(values) // min(values)
+
+
+def generate_unique_puzzle(size, seed, max_cage_size=4, max_attempts=50):
+    """
+    Generate a puzzle whose solution is unique. Returns the puzzle, the
+    number of attempts, generation time and solve time (in seconds).
+    Cages are capped at 4 cells, within max_cage_cells(size) on every grid
+    up to 9x9 (the notebook's generator allows up to `size`).
+    """
+    rng = random.Random(seed)
+    generate_time = solve_time = 0.0
+    for attempt in range(1, max_attempts + 1):
+        start = time.perf_counter()
+        grid = random_latin_square(size, rng)
+        cages = random_cages(grid, size, rng, max_cage_size)
+        solver = KenKenSolver(size, cages)
+        unique = solver.count_solutions(limit=2) == 1
+        generate_time += time.perf_counter() - start
+        if not unique:
+            continue
+
+        # Time a cold solve and check it reproduces the grid
+        start = time.perf_counter()
+        solved = KenKenSolver(size, cages).solve()
+        solve_time = time.perf_counter() - start
+        if solved != grid:
+            raise RuntimeError(f"Solver disagrees with generated grid (size {size}, seed {seed})")
+        return Puzzle(size, grid, cages), attempt, generate_time, solve_time
+    raise RuntimeError(f"No unique puzzle after {max_attempts} attempts (size {size}, seed {seed})")
+
+
+def encode_puzzle(puzzle):
+    """Pack a puzzle into one binary record"""
+    size = puzzle.size
+    parts = [struct.pack("BB", size, len(puzzle.cages)),
+             bytes(v for row in puzzle.solution for v in row)]
+    for cage in puzzle.cages:
+        parts.append(struct.pack("<BIB", OPERATIONS.index(cage.operation), cage.target, len(cage.cells)))
+        parts.append(bytes(r * size + c for r, c in cage.cells))
+    return b"".join(parts)
+
+
+def read_puzzles(path):
+    """Yield the puzzles stored in a pipeline file"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a KenKen puzzle file")
+        while True:
+            header = f.read(2)
+            if not header:
+                return
+            size, n_cages = struct.unpack("BB", header)
+            values = f.read(size * size)
+            solution = [list(values[r * size:(r + 1) * size]) for r in range(size)]
+            cages = []
+            for _ in range(n_cages):
+                op, target, k = struct.unpack("<BIB", f.read(6))
+                cells = [divmod(cell, size) for cell in f.read(k)]
+                cages.append(Cage(cells, OPERATIONS[op], target))
+            yield Puzzle(size, solution, cages)
+
+
+def _generate_task(task):
+    size, seed, max_cage_size = task
+    puzzle, attempts, generate_time, solve_time = generate_unique_puzzle(size, seed, max_cage_size)
+    return size, encode_puzzle(puzzle), attempts, generate_time, solve_time
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_pipeline(sizes, count, out_path, workers=None, seed=0, max_cage_size=4):
+    """Generate `count` puzzles per size into out_path; returns per-size stats"""
+    tasks = [(size, seed * 1000003 + size * 100003 + i, max_cage_size)
+             for size in sizes for i in range(count)]
+    stats = {size: {"generate": [], "solve": [], "attempts": 0} for size in sizes}
+
+    start = time.perf_counter()
+    with open(out_path, "wb") as out, multiprocessing.Pool(workers) as pool:
+        out.write(MAGIC)
+        chunksize = max(1, len(tasks) // (4 * (workers or os.cpu_count() or 1)))
+        for size, record, attempts, generate_time, solve_time in pool.imap_unordered(
+                _generate_task, tasks, chunksize=chunksize):
+            out.write(record)
+            stats[size]["generate"].append(generate_time)
+            stats[size]["solve"].append(solve_time)
+            stats[size]["attempts"] += attempts
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(tasks)} puzzles written to {out_path} "
+          f"({os.path.getsize(out_path)} bytes) in {elapsed:.1f}s")
+    print(f"{'size':>4} {'count':>6} {'attempts':>9} {'gen mean ms':>12} {'solve mean ms':>14} "
+          f"{'solve p50 ms':>13} {'solve p95 ms':>13}")
+    for size in sizes:
+        generate = sorted(stats[size]["generate"])
+        solve = sorted(stats[size]["solve"])
+        print(f"{size:>4} {len(solve):>6} {stats[size]['attempts'] / len(solve):>9.2f} "
+              f"{sum(generate) / len(generate) * 1000:>12.2f} {sum(solve) / len(solve) * 1000:>14.2f} "
+              f"{_percentile(solve, 0.5) * 1000:>13.2f} {_percentile(solve, 0.95) * 1000:>13.2f}")
+    return stats
+
+
+def time_solver(size=9, count=10, seed=0, max_cage_size=None, limit=2.0):
+    """
+    Solve and count (up to 2) solutions of `count` random puzzles built like
+    the notebook's (random_cages, not filtered for uniqueness), with cages
+    of up to max_cage_size cells (default: max_cage_cells(size)). Prints
+    one line per puzzle and raises if any takes longer than `limit` seconds.
+    Returns the [(solve seconds, count seconds, search nodes)].
+    """
+    if max_cage_size is None:
+        max_cage_size = max_cage_cells(size)
+    timings = []
+    for i in range(count):
+        rng = random.Random(seed * 1000003 + size * 100003 + i)
+        grid = random_latin_square(size, rng)
+        cages = random_cages(grid, size, rng, max_cage_size)
+        start = time.perf_counter()
+        solver = KenKenSolver(size, cages)
+        solved = solver.solve()
+        solve_time = time.perf_counter() - start
+        start = time.perf_counter()
+        solutions = solver.count_solutions(limit=2)
+        count_time = time.perf_counter() - start
+        if solved is None or not all(cage_value_ok(cage.operation, [solved[r][c] for r, c in cage.cells], cage.target)
+                                     for cage in cages):
+            raise RuntimeError(f"Solver failed a generated puzzle (size {size}, puzzle {i})")
+        print(f"{size}x{size} puzzle {i}: solve {solve_time * 1000:.1f} ms, "
+              f"count ({solutions}) {count_time * 1000:.1f} ms, {solver.nodes} nodes")
+        timings.append((solve_time, count_time, solver.nodes))
+
+    slow = [i for i, (solve_time, count_time, _) in enumerate(timings) if max(solve_time, count_time) > limit]
+    if slow:
+        raise RuntimeError(f"{size}x{size} puzzles {slow} took over {limit}s (cages of up to {max_cage_size} cells)")
+    return timings
+
+
+def check_file(path):
+    """Re-validate every stored puzzle against its solution; returns the count"""
+    count = 0
+    for puzzle in read_puzzles(path):
+        for cage in puzzle.cages:
+            values = [puzzle.solution[r][c] for r, c in cage.cells]
+            if not cage_value_ok(cage.operation, values, cage.target):
+                raise ValueError(f"Puzzle {count}: cage {cage} does not match its solution")
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a corpus of unique KenKen puzzles")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 5, 6, 7, 8, 9])
+    parser.add_argument("--count", type=int, default=100, help="puzzles per size")
+    parser.add_argument("--out", default="kenken_puzzles.kkn")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-cage-size", type=int, default=None,
+                        help="default: 4, or max_cage_cells(size) with --timing")
+    parser.add_argument("--check", action="store_true", help="re-validate the written file")
+    parser.add_argument("--timing", action="store_true",
+                        help="only time the solver on --count notebook-style puzzles per size")
+    args = parser.parse_args()
+
+    if args.timing:
+        for size in args.sizes:
+            time_solver(size, args.count, args.seed, args.max_cage_size)
+        raise SystemExit
+    run_pipeline(args.sizes, args.count, args.out, args.workers, args.seed, args.max_cage_size or 4)
+    if args.check:
+        print(f"{check_file(args.out)} puzzles validated")
@@ -0,0 +1,656 @@
+"""
+Constraint propagation solver for KenKen puzzles
+
+Cells are numbered row * size + col and every cell domain is a bitmask with
+bit v set when value v is still possible. Each cage keeps the list of value
+tuples that satisfy its operation and target (precomputed and cached per
+operation, target, size and cage shape), and search combines:
+  - forward checking on rows and columns (assigned values leave their peers),
+  - hidden singles (a value with one place left in a row/column goes there),
+  - generalised arc consistency on cages (domains shrink to the values that
+    still appear in some cage tuple),
+  - pointing (values every tuple puts in one row or column of a cage leave
+    the rest of that row or column),
+  - MRV ordering (branch on the cell with the fewest values left).
+
+Cages too large for a tuple table are revised over layered partial states
+instead. While their domains are still too wide even for that, they are
+revised exactly within each row and each column of the cage (the values a
+row's cells use are distinct, so a row contributes one of few value sets),
+with the rows (or columns) combined through their reachable sums or
+products. Once their domains narrow they get a tuple table again.
+
+Cages longer than max_cage_cells(size) (5 cells on 9x9) still solve, but
+with a warning: they can take minutes.
+
+Cages are any objects with `cells`, `operation` and `target` attributes, as
+built by the notebook's `Cage` class; operations use the same rules as
+`validate_cage_operation`.
+"""
+
+import operator
+import warnings
+from functools import lru_cache, reduce
+
+# Cages with more candidate tuples than this, or whose cells span more value
+# combinations than MAX_CAGE_SPACE, are revised without a tuple table
+MAX_CAGE_TUPLES = 1000
+MAX_CAGE_SPACE = 50000
+
+# Above this many value combinations a cage is revised row by row and column
+# by column (_clique_supports) until its domains shrink
+MAX_LAYER_SPACE = 20000
+
+# Below this many value combinations a cage gets a tuple table again
+MAX_TABLE_SPACE = 20000
+
+
+def max_cage_cells(size):
+    """
+    Largest cage (in cells) the solver is timed for on a size x size grid:
+    random puzzles with cages up to this size (random_cages in
+    kenken_pipeline) solve in about a second. Any size up to 7x7, 6 cells
+    on 8x8 and 5 on 9x9; larger grids are untimed and get the pipeline's 4.
+    Beyond it, a few long + or * cages leave search with many rows to try
+    and some puzzles take minutes.
+    """
+    if size <= 7:
+        return size
+    return {8: 6, 9: 5}.get(size, 4)
+
+
+def cage_value_ok(operation, values, target):
+    """Check a fully assigned cage (same rules as validate_cage_operation)"""
+    if len(values) == 1:
+        return target == values[0]
+    if operation == '+':
+        return sum(values) == target
+    elif operation == '-':
+        return abs(values[0] - values[1]) == target
+    elif operation == '*':
+        return reduce(operator.mul, values, 1) == target
+    elif operation == '/':
+        return max(values) // min(values) == target
+    return False
+
+
+def _enumerate_tuples(operation, target, domains, conflicts, limit):
+    """
+    All value tuples for a cage drawn from per-cell value lists `domains`,
+    where conflicts[i] lists earlier cells sharing a row or column with cell
+    i. Returns None if there are more than `limit` tuples.
+    """
+    k = len(domains)
+    results = []
+    min_rest = [0] * (k + 1)
+    max_rest = [0] * (k + 1)
+    for i in range(k - 1, -1, -1):
+        min_rest[i] = min_rest[i + 1] + domains[i][0]
+        max_rest[i] = max_rest[i + 1] + domains[i][-1]
+
+    pruned_sum = k > 1 and operation == '+'
+    pruned_product = k > 1 and operation == '*'
+
+    def extend(prefix, acc):
+        i = len(prefix)
+        if i == k:
+            if cage_value_ok(operation, prefix, target):
+                results.append(prefix)
+                if len(results) > limit:
+                    raise OverflowError
+            return
+        banned = 0
+        for j in conflicts[i]:
+            banned |= 1 << prefix[j]
+        last = i == k - 1
+        for v in domains[i]:
+            if banned >> v & 1:
+                continue
+            if pruned_sum:
+                total = acc + v
+                if total + min_rest[i + 1] > target:
+                    break  # Values are increasing, so the rest overshoot too
+                if total + max_rest[i + 1] < target:
+                    continue
+                extend(prefix + (v,), total)
+            elif pruned_product:
+                product = acc * v
+                if target % product or (last and product != target):
+                    continue
+                extend(prefix + (v,), product)
+            else:
+                extend(prefix + (v,), acc)
+
+    try:
+        extend((), 1 if operation == '*' else 0)
+    except OverflowError:
+        return None
+    return results
+
+
+@lru_cache(maxsize=None)
+def cage_candidates(operation, target, size, conflicts, limit=MAX_CAGE_TUPLES):
+    """
+    Cached valid value tuples for a cage shape on an empty size x size grid,
+    or None if there are more than `limit` of them
+    """
+    if operation in ('+', '*') and size ** len(conflicts) > MAX_CAGE_SPACE:
+        return None
+    values = list(range(1, size + 1))
+    return _enumerate_tuples(operation, target, [values] * len(conflicts), conflicts, limit)
+
+
+def _bits(mask):
+    """Values present in a domain mask, in increasing order"""
+    values = []
+    v = 0
+    while mask:
+        if mask & 1:
+            values.append(v)
+        mask >>= 1
+        v += 1
+    return values
+
+
+def _popcount(mask):
+    return bin(mask).count('1')
+
+
+
+class KenKenSolver:
+    """Solver for one KenKen puzzle of a given size and cage layout"""
+
+    def __init__(self, size, cages):
+        self.size = size
+        self.cages = list(cages)
+        self.full = sum(1 << v for v in range(1, size + 1))
+        self.nodes = 0
+
+        n_cells = size * size
+        self.cage_cells = []
+        self.cage_conflicts = []
+        self.cage_layout = []
+        self.cage_cliques = []
+        self.cage_outside = []
+        self.cage_of = [-1] * n_cells
+        for ci, cage in enumerate(self.cages):
+            cells = [r * size + c for r, c in cage.cells]
+            for cell in cells:
+                if self.cage_of[cell] != -1:
+                    raise ValueError(f"Cell {divmod(cell, size)} belongs to more than one cage")
+                self.cage_of[cell] = ci
+            self.cage_cells.append(cells)
+            self.cage_conflicts.append(tuple(
+                tuple(j for j in range(i) if cells[j] // size == cells[i] // size
+                      or cells[j] % size == cells[i] % size)
+                for i in range(len(cells))))
+            # Position of each cell's row and column among the cage's rows
+            # and columns, and whether it is the last cage cell in them
+            rows = sorted({c // size for c in cells})
+            cols = sorted({c % size for c in cells})
+            row_of = [rows.index(c // size) for c in cells]
+            col_of = [cols.index(c % size) for c in cells]
+            self.cage_layout.append((
+                row_of, col_of,
+                [row_of[i] not in row_of[i + 1:] for i in range(len(cells))],
+                [col_of[i] not in col_of[i + 1:] for i in range(len(cells))]))
+            # The cage's cells grouped by row and by column, as cage positions
+            self.cage_cliques.append((
+                [[i for i in range(len(cells)) if row_of[i] == r] for r in range(len(rows))],
+                [[i for i in range(len(cells)) if col_of[i] == c] for c in range(len(cols))]))
+            # The cells outside the cage in each of its rows, then columns
+            self.cage_outside.append(
+                [[r * size + c for c in range(size) if r * size + c not in cells] for r in rows] +
+                [[r * size + c for r in range(size) if r * size + c not in cells] for c in cols])
+        if -1 in self.cage_of:
+            raise ValueError(f"Cell {divmod(self.cage_of.index(-1), size)} is not in any cage")
+        longest = max((len(cells) for cells in self.cage_cells), default=0)
+        if longest > max_cage_cells(size):
+            warnings.warn(f"A cage has {longest} cells; on a {size}x{size} grid the solver is timed for cages of "
+                          f"up to {max_cage_cells(size)} cells and may take minutes", RuntimeWarning, stacklevel=2)
+
+        # Rows and columns as cell lists, and each cell's row/column peers
+        self.units = ([[r * size + c for c in range(size)] for r in range(size)] +
+                      [[r * size + c for r in range(size)] for c in range(size)])
+        self.peers = [
+            [p for p in range(n_cells) if p != cell
+             and (p // size == cell // size or p % size == cell % size)]
+            for cell in range(n_cells)]
+        self._layer_cache = {}
+        self._codes = {}
+        # Sum and product of the values in every domain-style mask
+        self._mask_sums = [0] * (2 << size)
+        self._mask_products = [1] * (2 << size)
+        for mask in range(1, 2 << size):
+            low = mask & -mask
+            self._mask_sums[mask] = self._mask_sums[mask ^ low] + low.bit_length() - 1
+            self._mask_products[mask] = self._mask_products[mask ^ low] * (low.bit_length() - 1)
+        self.initial_tuples = [
+            cage_candidates(cage.operation, cage.target, size, conflicts)
+            for cage, conflicts in zip(self.cages, self.cage_conflicts)]
+
+    def _initial_state(self, grid):
+        domains = [self.full] * (self.size * self.size)
+        if grid is not None:
+            for r, row in enumerate(grid):
+                for c, value in enumerate(row):
+                    if value:
+                        domains[r * self.size + c] = 1 << value
+        return domains, list(self.initial_tuples)
+
+    def _revise_cage(self, ci, domains, tuples):
+        """
+        Shrink the domains of a cage's cells to the values supported by its
+        tuples. Returns the changed cells, or None on a contradiction.
+        """
+        cells = self.cage_cells[ci]
+        candidates = tuples[ci]
+        if candidates is None:
+            # Narrow enough again for a tuple table (kept for this branch)
+            space = reduce(operator.mul, (_popcount(domains[c]) for c in cells), 1)
+            if space > MAX_TABLE_SPACE:
+                return self._revise_cage_layers(ci, domains)
+            cage = self.cages[ci]
+            candidates = _enumerate_tuples(cage.operation, cage.target, [_bits(domains[c]) for c in cells],
+                                           self.cage_conflicts[ci], MAX_CAGE_TUPLES)
+            if candidates is None:
+                return self._revise_cage_layers(ci, domains)
+
+        for i, cell in enumerate(cells):
+            d = domains[cell]
+            if d != self.full:
+                candidates = [t for t in candidates if d >> t[i] & 1]
+        if not candidates:
+            return None
+        tuples[ci] = candidates
+
+        changed = []
+        for i, cell in enumerate(cells):
+            support = 0
+            for t in candidates:
+                support |= 1 << t[i]
+            new = domains[cell] & support
+            if new != domains[cell]:
+                domains[cell] = new
+                changed.append(cell)
+
+        # Values every tuple puts in one of the cage's rows or columns
+        row_cliques, col_cliques = self.cage_cliques[ci]
+        required = []
+        for clique in row_cliques + col_cliques:
+            common = self.full
+            for t in candidates:
+                used = 0
+                for i in clique:
+                    used |= 1 << t[i]
+                common &= used
+                if not common:
+                    break
+            required.append(common)
+        return self._point(ci, required, domains, changed)
+
+    def _point(self, ci, required, domains, changed):
+        """
+        Remove the values a cage must place in one of its rows or columns
+        (`required`, row cliques first) from the rest of that row or column.
+        Returns the changed cells, or None on a contradiction.
+        """
+        for outside, values in zip(self.cage_outside[ci], required):
+            if not values:
+                continue
+            for cell in outside:
+                if domains[cell] & values:
+                    domains[cell] &= ~values
+                    if not domains[cell]:
+                        return None
+                    changed.append(cell)
+        return changed
+
+    def _revise_cage_layers(self, ci, domains):
+        """
+        Revise a cage whose tuples are too many to list. Partial assignments
+        are merged into layered states (running sum or product, plus the
+        values already used in each of the cage's rows and columns), so the
+        domains shrink exactly as with a tuple table without listing tuples.
+        Returns the changed cells, or None on a contradiction.
+        """
+        cells = self.cage_cells[ci]
+        key = (ci,) + tuple(domains[c] for c in cells)
+        revision = self._layer_cache.get(key, False)
+        if revision is False:
+            revision = self._layer_revision(ci, domains)
+            self._layer_cache[key] = revision
+        if revision is None:
+            return None
+        supports, required = revision
+
+        changed = []
+        for cell, support in zip(cells, supports):
+            new = domains[cell] & support
+            if new != domains[cell]:
+                domains[cell] = new
+                changed.append(cell)
+        return self._point(ci, required, domains, changed)
+
+    def _layer_revision(self, ci, domains):
+        """
+        (supports of each cell, values required in each row and column of
+        the cage) for _revise_cage_layers, or None if the cage cannot be met
+        """
+        row_cliques, col_cliques = self.cage_cliques[ci]
+        space = reduce(operator.mul, (_popcount(domains[c]) for c in self.cage_cells[ci]), 1)
+        if space > MAX_LAYER_SPACE:
+            # Two relaxations, each exact within its rows or columns
+            by_row = self._clique_supports(ci, domains, row_cliques)
+            if by_row is None:
+                return None
+            by_column = self._clique_supports(ci, domains, col_cliques)
+            if by_column is None:
+                return None
+            return [a & b for a, b in zip(by_row[0], by_column[0])], by_row[1] + by_column[1]
+
+        supports = self._layer_supports(ci, domains)
+        if supports is None:
+            return None
+        # A row or column whose cells have as many values left as cells
+        # needs all of them
+        required = []
+        for clique in row_cliques + col_cliques:
+            union = 0
+            for i in clique:
+                union |= supports[i]
+            required.append(union if _popcount(union) == len(clique) else 0)
+        return supports, required
+
+    def _clique_supports(self, ci, domains, cliques):
+        """
+        Supports of a cage too large for layered states, with the all-different
+        rule kept only inside each clique (cage cells sharing one row, or one
+        column). Each clique is expanded over the sets of values it uses;
+        those sets are few, and they fix the clique's sum or product. A value
+        is supported if its clique can reach a total that the other cliques'
+        reachable totals complete to the target.
+        """
+        cells = self.cage_cells[ci]
+        cage = self.cages[ci]
+        target = cage.target
+        product = cage.operation == '*'
+        totals = self._mask_products if product else self._mask_sums
+
+        codes, target_code, valid = self._total_codes(ci)
+        if target_code < 0:
+            return None  # A prime factor of the target is larger than any value
+
+        layers_of, reachable = [], []
+        for clique in cliques:
+            layers = [{0}]
+            for i in clique:
+                d = domains[cells[i]]
+                following = set()
+                for used in layers[-1]:
+                    free = d & ~used
+                    while free:
+                        bit = free & -free
+                        free ^= bit
+                        mask = used | bit
+                        # Partial totals already past the target cannot recover
+                        if (target % totals[mask] if product else totals[mask] > target):
+                            continue
+                        following.add(mask)
+                if not following:
+                    return None
+                layers.append(following)
+            layers_of.append(layers)
+            reachable.append(reduce(operator.or_, (1 << codes[totals[mask]] for mask in layers[-1])))
+
+        # Totals reachable by the cliques before and after each clique, as
+        # bit sets of codes: adding codes combines two totals
+        def combine(a, b):
+            combined = 0
+            while a:
+                low = a & -a
+                a ^= low
+                combined |= b << (low.bit_length() - 1)
+            return combined & valid
+
+        before = [1]
+        for totals_q in reachable[:-1]:
+            before.append(combine(before[-1], totals_q))
+        after = [1]
+        for totals_q in reversed(reachable[1:]):
+            after.append(combine(after[-1], totals_q))
+        after.reverse()
+
+        supports = [0] * len(cells)
+        required = []
+        for q, (clique, layers) in enumerate(zip(cliques, layers_of)):
+            others = combine(before[q], after[q])
+            alive = {mask for mask in layers[-1] if others >> (target_code - codes[totals[mask]]) & 1}
+            if not alive:
+                return None
+            required.append(reduce(operator.and_, alive))
+            # Walk back through the layers, collecting each cell's values
+            for j in range(len(clique) - 1, -1, -1):
+                d = domains[cells[clique[j]]]
+                previous = set()
+                for mask in alive:
+                    values = mask & d
+                    while values:
+                        bit = values & -values
+                        values ^= bit
+                        if mask ^ bit in layers[j]:
+                            supports[clique[j]] |= bit
+                            previous.add(mask ^ bit)
+                alive = previous
+        return supports, required
+
+    def _total_codes(self, ci):
+        """
+        Codes of the totals a part of a cage can reach (sums as themselves,
+        divisors of a product target as mixed-radix prime exponents, with
+        room for the sum of two), the target's code, and the bit set of the
+        codes that do not overshoot the target
+        """
+        if ci in self._codes:
+            return self._codes[ci]
+        target = self.cages[ci].target
+        if self.cages[ci].operation != '*':
+            self._codes[ci] = codes = (list(range(target + 1)), target, (2 << target) - 1)
+            return codes
+
+        radices = []
+        rest = target
+        for p in range(2, self.size + 1):
+            exponent = 0
+            while rest % p == 0:
+                rest //= p
+                exponent += 1
+            if exponent:
+                radices.append((p, exponent))
+        divisors = {1: 0}
+        place = 1
+        for p, exponent in radices:
+            divisors = {d * p ** e: code + e * place for d, code in divisors.items() for e in range(exponent + 1)}
+            place *= 2 * exponent + 1
+        valid = reduce(operator.or_, (1 << code for code in divisors.values()))
+        self._codes[ci] = codes = (divisors, divisors.get(target, -1), valid)
+        return codes
+
+    def _layer_supports(self, ci, domains):
+        """Supported values of each cage cell as masks, or None if none"""
+        cells = self.cage_cells[ci]
+        cage = self.cages[ci]
+        operation, target = cage.operation, cage.target
+        k = len(cells)
+        values = [_bits(domains[c]) for c in cells]
+
+        row_of, col_of, row_done, col_done = self.cage_layout[ci]
+        min_rest = [0] * (k + 1)
+        max_rest = [0] * (k + 1)
+        for i in range(k - 1, -1, -1):
+            min_rest[i] = min_rest[i + 1] + values[i][0]
+            max_rest[i] = max_rest[i + 1] + values[i][-1]
+
+        # Row and column masks are packed into one int each, `width` bits
+        # per row/column of the cage. A mask is cleared after its last cell
+        # so that states merge
+        width = self.size + 1
+        full = (1 << width) - 1
+        start = (1 if operation == '*' else 0, 0, 0)
+        layers = [{start: []}]
+        for i in range(k):
+            following = {}
+            row_shift, col_shift = row_of[i] * width, col_of[i] * width
+            last = i == k - 1
+            for state, moves in layers[i].items():
+                acc, row_masks, col_masks = state
+                banned = (row_masks >> row_shift) | (col_masks >> col_shift)
+                if row_done[i]:
+                    row_masks &= ~(full << row_shift)
+                if col_done[i]:
+                    col_masks &= ~(full << col_shift)
+                for v in values[i]:
+                    if banned >> v & 1:
+                        continue
+                    if operation == '+':
+                        new_acc = acc + v
+                        if new_acc + min_rest[i + 1] > target:
+                            break
+                        if new_acc + max_rest[i + 1] < target:
+                            continue
+                    else:
+                        new_acc = acc * v
+                        if target % new_acc or (last and new_acc != target):
+                            continue
+                    bit = 1 << v
+                    new_state = (new_acc,
+                                 row_masks if row_done[i] else row_masks | bit << row_shift,
+                                 col_masks if col_done[i] else col_masks | bit << col_shift)
+                    if new_state not in following:
+                        following[new_state] = []
+                    moves.append((v, new_state))
+            layers.append(following)
+
+        # Walk back from the complete states that satisfy the cage
+        alive = {state for state in layers[k] if state[0] == target}
+        supports = [0] * k
+        for i in range(k - 1, -1, -1):
+            previous = set()
+            for state, moves in layers[i].items():
+                for v, new_state in moves:
+                    if new_state in alive:
+                        supports[i] |= 1 << v
+                        previous.add(state)
+            alive = previous
+        if not alive:
+            return None
+        return supports
+
+    def _propagate(self, domains, tuples, dirty):
+        """Run propagation to a fixpoint; False on a contradiction"""
+        if dirty is None:
+            stack = list(range(len(domains)))
+            dirty_cages = set(range(len(self.cages)))
+        else:
+            stack = list(dirty)
+            dirty_cages = set()
+        peers = self.peers
+        while True:
+            while stack or dirty_cages:
+                while stack:
+                    cell = stack.pop()
+                    d = domains[cell]
+                    if d == 0:
+                        return False
+                    dirty_cages.add(self.cage_of[cell])
+                    if d & (d - 1) == 0:
+                        # Assigned: remove the value from row and column peers
+                        for p in peers[cell]:
+                            if domains[p] & d:
+                                domains[p] &= ~d
+                                if not domains[p]:
+                                    return False
+                                stack.append(p)
+                if dirty_cages:
+                    changed = self._revise_cage(dirty_cages.pop(), domains, tuples)
+                    if changed is None:
+                        return False
+                    stack.extend(changed)
+
+            # Hidden singles: every value must appear once in each unit
+            for unit in self.units:
+                seen_once = 0
+                seen_twice = 0
+                for cell in unit:
+                    d = domains[cell]
+                    seen_twice |= seen_once & d
+                    seen_once |= d
+                if seen_once != self.full:
+                    return False
+                singles = seen_once & ~seen_twice
+                if singles:
+                    for cell in unit:
+                        d = domains[cell] & singles
+                        if d and domains[cell] != d:
+                            if d & (d - 1):
+                                return False  # Two values need this cell
+                            domains[cell] = d
+                            stack.append(cell)
+            if not stack:
+                return True
+
+    def _search(self, domains, tuples):
+        """Yield every solution below this state as a domain list"""
+        self.nodes += 1
+        # MRV, ties broken towards the most constrained cage
+        best, best_score = -1, None
+        for cell, d in enumerate(domains):
+            if d & (d - 1):
+                candidates = tuples[self.cage_of[cell]]
+                score = (_popcount(d), len(candidates) if isinstance(candidates, list) else MAX_CAGE_TUPLES + 1)
+                if best_score is None or score < best_score:
+                    best, best_score = cell, score
+        if best == -1:
+            yield domains
+            return
+        for v in _bits(domains[best]):
+            child_domains = list(domains)
+            child_tuples = list(tuples)
+            child_domains[best] = 1 << v
+            if self._propagate(child_domains, child_tuples, [best]):
+                yield from self._search(child_domains, child_tuples)
+
+    def _solutions(self, grid):
+        self.nodes = 0
+        domains, tuples = self._initial_state(grid)
+        if not self._propagate(domains, tuples, None):
+            return
+        for solution in self._search(domains, tuples):
+            yield [[solution[r * self.size + c].bit_length() - 1 for c in range(self.size)]
+                   for r in range(self.size)]
+
+    def solve(self, grid=None):
+        """Return a solved grid (list of rows), or None if there is none"""
+        return next(self._solutions(grid), None)
+
+    def count_solutions(self, limit=2, grid=None):
+        """Count solutions, stopping at `limit` (2 is enough for uniqueness)"""
+        count = 0
+        for _ in self._solutions(grid):
+            count += 1
+            if count >= limit:
+                break
+        return count
+
+
+def solve_kenken_propagation(grid, cages):
+    """
+    Solve in place like `solve_kenken`: fills `grid` and returns True,
+    or returns False if the puzzle has no solution
+    """
+    solution = KenKenSolver(len(grid), cages).solve(grid)
+    if solution is None:
+        return False
+    for row, values in zip(grid, solution):
+        row[:] = values
+    return True
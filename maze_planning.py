@@ -0,0 +1,206 @@
+"""
+Model-based planning for the RL_HW.ipynb maze
+
+MazeEnvironment is fully known, so the optimal policy can be computed
+directly from the transition tables in maze_rl instead of being sampled:
+value iteration and policy iteration below are vectorised over all states.
+benchmark() compares both planners with Q-learning (episodes and wall time
+until the greedy policy follows a shortest path) across maze sizes. It
+only returns numbers; plotting is done separately by plot_benchmark().
+"""
+
+import time
+
+import numpy as np
+
+from maze_rl import ACTIONS, VectorQLearning, notebook_maze, random_maze
+
+
+def q_values(model, values, gamma):
+    """(n_states, n_actions) one-step lookahead values for a state-value vector"""
+    return model.reward + gamma * np.where(model.done, 0.0, values[model.next_state])
+
+
+def value_iteration(model, gamma=0.95, tol=1e-6, max_iterations=100000):
+    """
+    Returns (values, policy, iterations); values and policy have the maze's
+    (size, size) shape and policy holds action indices.
+    """
+    values = np.zeros(model.n_states)
+    for iteration in range(1, max_iterations + 1):
+        new_values = q_values(model, values, gamma).max(axis=1)
+        delta = np.abs(new_values - values).max()
+        values = new_values
+        if delta < tol:
+            break
+    policy = q_values(model, values, gamma).argmax(axis=1)
+    shape = (model.size, model.size)
+    return values.reshape(shape), policy.reshape(shape), iteration
+
+
+def evaluate_policy(model, policy, gamma=0.95, tol=1e-6):
+    """
+    State values of a deterministic policy (flat action array). Returns
+    after k steps are combined into returns after 2k steps (pointer
+    jumping), so only about log2(log(tol) / log(gamma)) passes are needed.
+    """
+    states = np.arange(model.n_states)
+    following = model.next_state[states, policy]
+    returns = model.reward[states, policy]
+    # Discount still applied after the steps taken so far; 0 once the episode ended
+    discount = np.where(model.done[states, policy], 0.0, gamma)
+
+    bound = np.abs(model.reward).max() / (1 - gamma)
+    while discount.max() * bound >= tol:
+        returns = returns + discount * returns[following]
+        discount = discount * discount[following]
+        following = following[following]
+    return returns
+
+
+def policy_iteration(model, gamma=0.95, tol=1e-6, max_iterations=1000):
+    """Returns (values, policy, iterations) like value_iteration"""
+    policy = np.zeros(model.n_states, dtype=np.intp)
+    for iteration in range(1, max_iterations + 1):
+        values = evaluate_policy(model, policy, gamma, tol)
+        q = q_values(model, values, gamma)
+        # Only switch actions that are strictly better, so ties cannot cycle
+        current = q[np.arange(model.n_states), policy]
+        improved = q.max(axis=1) > current + tol
+        if not improved.any():
+            break
+        policy = np.where(improved, q.argmax(axis=1), policy)
+    shape = (model.size, model.size)
+    return values.reshape(shape), policy.reshape(shape), iteration
+
+
+def policy_path(model, policy, max_steps=None):
+    """Cells visited by following a (size, size) policy from the start"""
+    flat_policy = np.asarray(policy).ravel()
+    state = model.start_state
+    path = [model.start]
+    for _ in range(max_steps or model.n_states):
+        state = int(model.next_state[state, flat_policy[state]])
+        path.append(model.state_cell(state))
+        if state == model.goal_state:
+            break
+    return path
+
+
+class PolicyAgent:
+    """Wraps a planned policy with the notebook agent's choose_action(state)"""
+
+    def __init__(self, model, policy):
+        self.model = model
+        self.policy = np.asarray(policy)
+
+    def choose_action(self, state):
+        return ACTIONS[self.policy[state]]
+
+
+def episodes_to_converge(model, n_envs=1, gamma=0.95, max_episodes=200000, check_every=None, seed=0):
+    """
+    Train Q-learning until its greedy policy follows a shortest path.
+    Returns (episodes, seconds, agent); episodes is None if it never converged.
+    """
+    shortest = model.shortest_path_length()
+    agent = VectorQLearning(model, discount_factor=gamma, n_envs=n_envs, seed=seed)
+    check_every = check_every or max(10, n_envs)
+    state = {"next_check": check_every, "converged": None}
+
+    def converged(agent, finished):
+        if finished < state["next_check"]:
+            return False
+        state["next_check"] = finished + check_every
+        if len(agent.greedy_path(shortest + 1)) - 1 == shortest:
+            state["converged"] = finished
+            return True
+        return False
+
+    start = time.perf_counter()
+    agent.train(max_episodes, max_steps=20 * model.n_states, callback=converged)
+    return state["converged"], time.perf_counter() - start, agent
+
+
+def benchmark(sizes=(7, 15, 25, 50), n_envs=(1, 1024), gamma=0.95, max_episodes=200000,
+              sequential_max_size=25, seed=0):
+    """
+    Planning vs Q-learning on the notebook maze (size 7) and random mazes.
+    Q-learning with one environment is the notebook's QLearningAgent update
+    and is only run up to sequential_max_size (it needs minutes beyond).
+    Returns one dict per (size, method).
+    """
+    rows = []
+    for size in sizes:
+        model = notebook_maze() if size == 7 else random_maze(size, seed=seed)
+        shortest = model.shortest_path_length()
+
+        for name, planner in (("value_iteration", value_iteration), ("policy_iteration", policy_iteration)):
+            start = time.perf_counter()
+            _, policy, iterations = planner(model, gamma)
+            elapsed = time.perf_counter() - start
+            rows.append({"size": size, "method": name, "iterations": iterations, "episodes": None,
+                         "seconds": elapsed, "path_length": len(policy_path(model, policy)) - 1,
+                         "shortest": shortest})
+
+        for envs in n_envs:
+            if envs == 1 and size > sequential_max_size:
+                continue
+            episodes, elapsed, agent = episodes_to_converge(model, envs, gamma, max_episodes, seed=seed)
+            rows.append({"size": size, "method": f"q_learning_{envs}_envs", "iterations": None,
+                         "episodes": episodes, "seconds": elapsed,
+                         "path_length": len(agent.greedy_path()) - 1, "shortest": shortest})
+    return rows
+
+
+def print_benchmark(rows):
+    print(f"{'size':>5} {'method':>22} {'iterations':>11} {'episodes':>9} {'seconds':>9} {'path':>6} {'shortest':>9}")
+    for row in rows:
+        iterations = "-" if row["iterations"] is None else row["iterations"]
+        if row["iterations"] is not None:
+            episodes = "-"
+        else:
+            episodes = "no conv." if row["episodes"] is None else row["episodes"]
+        print(f"{row['size']:>5} {row['method']:>22} {iterations:>11} {episodes:>9} "
+              f"{row['seconds']:>9.3f} {row['path_length']:>6} {row['shortest']:>9}")
+
+
+def plot_benchmark(rows):
+    """Wall time per method against maze size (log scale)"""
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 6))
+    for method in dict.fromkeys(row["method"] for row in rows):
+        points = [(row["size"], row["seconds"]) for row in rows if row["method"] == method]
+        plt.plot(*zip(*points), 'o-', label=method)
+    plt.yscale('log')
+    plt.xlabel('Maze size')
+    plt.ylabel('Wall time to an optimal policy (s)')
+    plt.title('Planning vs Q-learning')
+    plt.grid(True)
+    plt.legend()
+    plt.show()
+
+
+def plot_policy(model, policy, values=None):
+    """Walls, the value function and the policy's arrows"""
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(8, 8))
+    if values is not None:
+        plt.imshow(np.where(model.walls, np.nan, values), cmap='viridis')
+        plt.colorbar(label='State value')
+    plt.imshow(np.where(model.walls, 1.0, np.nan), cmap='binary', vmin=0, vmax=1)
+    rows, cols = np.nonzero(~model.walls)
+    # Arrow (dx, dy) per action in image coordinates: up, right, down, left
+    arrows = np.array([(0, -1), (1, 0), (0, 1), (-1, 0)]) * 0.35
+    dx, dy = arrows[policy[rows, cols]].T
+    plt.quiver(cols, rows, dx, dy, angles='xy', scale_units='xy', scale=1, color='r')
+    path = np.array(policy_path(model, policy))
+    plt.plot(path[:, 1], path[:, 0], 'w-', linewidth=2)
+    plt.title('Optimal policy')
+    plt.show()
+
+
+if __name__ == "__main__":
+    print_benchmark(benchmark())
@@ -0,0 +1,255 @@
+"""
+Vectorised tabular Q-learning for the RL_HW.ipynb maze
+
+The maze is compiled once into transition and reward tables indexed by
+(state, action), where state = row * size + col and the actions are
+integers in the notebook's order ('up', 'right', 'down', 'left'). The
+rewards match MazeEnvironment.step: -10 for walking into a wall (the agent
+stays put), +100 for reaching the goal and -1 for any other step.
+
+VectorQLearning keeps the Q-table as a (size, size, n_actions) array and
+steps many independent copies of the maze in lock-step, so one NumPy
+update serves every environment at once.
+"""
+
+from collections import deque
+
+import numpy as np
+
+ACTIONS = ['up', 'right', 'down', 'left']
+# (row, col) offset of each action
+DELTAS = np.array([(-1, 0), (0, 1), (1, 0), (0, -1)])
+
+WALL_REWARD = -10
+GOAL_REWARD = 100
+STEP_REWARD = -1
+
+# Walls of the notebook's 7x7 maze
+NOTEBOOK_WALLS = [
+    (1, 1), (1, 2), (1, 3), (3, 1), (3, 2), (3, 3),
+    (5, 4), (5, 5), (2, 5), (3, 5), (4, 2)
+]
+
+
+class MazeModel:
+    """
+    Transition tables of a square maze. `walls` is a (size, size) boolean
+    mask; start and goal are (row, col) cells.
+    """
+
+    def __init__(self, walls, start=(0, 0), goal=None):
+        self.walls = np.asarray(walls, dtype=bool)
+        self.size = self.walls.shape[0]
+        self.start = tuple(start)
+        self.goal = tuple(goal) if goal is not None else (self.size - 1, self.size - 1)
+        self.n_states = self.size * self.size
+        self.n_actions = len(ACTIONS)
+        self.start_state = self.state_index(self.start)
+        self.goal_state = self.state_index(self.goal)
+        self._build_tables()
+
+    @classmethod
+    def from_environment(cls, env):
+        """Compile a notebook MazeEnvironment (its 'W', 'S' and 'G' cells)"""
+        maze = np.asarray(env.maze)
+        start = tuple(int(v) for v in np.argwhere(maze == 'S')[0])
+        goal = tuple(int(v) for v in np.argwhere(maze == 'G')[0])
+        return cls(maze == 'W', start, goal)
+
+    def state_index(self, cell):
+        return cell[0] * self.size + cell[1]
+
+    def state_cell(self, state):
+        return divmod(int(state), self.size)
+
+    def _build_tables(self):
+        """next_state, reward and done arrays, each of shape (n_states, n_actions)"""
+        size = self.size
+        rows, cols = np.divmod(np.arange(self.n_states), size)
+        next_rows = np.clip(rows[:, None] + DELTAS[:, 0], 0, size - 1)
+        next_cols = np.clip(cols[:, None] + DELTAS[:, 1], 0, size - 1)
+        target = next_rows * size + next_cols
+
+        flat_walls = self.walls.ravel()
+        hits_wall = flat_walls[target]
+        self.next_state = np.where(hits_wall, np.arange(self.n_states)[:, None], target)
+        self.reward = np.where(hits_wall, WALL_REWARD, STEP_REWARD).astype(np.float64)
+        self.done = self.next_state == self.goal_state
+        self.reward[self.done] = GOAL_REWARD
+
+        # The goal is terminal: no further reward, the episode has ended
+        self.next_state[self.goal_state] = self.goal_state
+        self.reward[self.goal_state] = 0.0
+        self.done[self.goal_state] = True
+
+    def step(self, states, actions):
+        """Vectorised step: (next_states, rewards, dones) for arrays of states and actions"""
+        # 1-D take on the flattened tables is much cheaper than 2-D fancy indexing
+        index = states * self.n_actions + actions
+        return self.next_state.take(index), self.reward.take(index), self.done.take(index)
+
+    def shortest_path_length(self):
+        """Fewest moves from start to goal, or None if the goal is unreachable"""
+        distance = {self.start_state: 0}
+        queue = deque([self.start_state])
+        while queue:
+            state = queue.popleft()
+            if state == self.goal_state:
+                return distance[state]
+            for next_state in self.next_state[state]:
+                next_state = int(next_state)
+                if next_state not in distance:
+                    distance[next_state] = distance[state] + 1
+                    queue.append(next_state)
+        return None
+
+
+def notebook_maze(size=7):
+    """The notebook's maze (its wall pattern is laid out for size 7)"""
+    walls = np.zeros((size, size), dtype=bool)
+    for pos in NOTEBOOK_WALLS:
+        if pos[0] < size and pos[1] < size:
+            walls[pos] = True
+    return MazeModel(walls)
+
+
+def random_maze(size, wall_density=0.25, seed=None, max_attempts=100):
+    """Random maze with its goal reachable from the start"""
+    rng = np.random.default_rng(seed)
+    for _ in range(max_attempts):
+        walls = rng.random((size, size)) < wall_density
+        walls[0, 0] = walls[size - 1, size - 1] = False
+        model = MazeModel(walls)
+        if model.shortest_path_length() is not None:
+            return model
+    raise ValueError(f"No solvable {size}x{size} maze at wall density {wall_density}")
+
+
+class VectorQLearning:
+    """
+    Q-learning over `n_envs` copies of a maze stepped in lock-step.
+
+    When several environments update the same (state, action) in one tick,
+    each update is computed from the same old Q-table and the last one
+    written is kept, as with asynchronous Q-learning.
+    """
+
+    def __init__(self, model, learning_rate=0.1, discount_factor=0.95, epsilon=0.1, n_envs=64, seed=None):
+        self.model = model
+        self.lr = learning_rate
+        self.gamma = discount_factor
+        self.epsilon = epsilon
+        self.n_envs = n_envs
+        self.rng = np.random.default_rng(seed)
+        self.q_table = np.zeros((model.size, model.size, model.n_actions))
+        self.steps = 0
+
+    @property
+    def q_flat(self):
+        """(n_states, n_actions) view of the Q-table"""
+        return self.q_table.reshape(self.model.n_states, self.model.n_actions)
+
+    def greedy(self, states):
+        """(greedy actions, their Q-values) for an array of states"""
+        values = self.q_flat.take(states, axis=0)
+        actions = values.argmax(axis=1)
+        return actions, values.ravel().take(np.arange(len(states)) * self.model.n_actions + actions)
+
+    def greedy_actions(self, states):
+        return self.greedy(states)[0]
+
+    def choose_actions(self, states):
+        """Epsilon-greedy actions for an array of states"""
+        actions = self.greedy_actions(states)
+        explore = self.rng.random(len(states)) < self.epsilon
+        actions[explore] = self.rng.integers(self.model.n_actions, size=int(explore.sum()))
+        return actions
+
+    def choose_action(self, state):
+        """Notebook-compatible: epsilon-greedy action name for a (row, col) state"""
+        action = self.choose_actions(np.array([self.model.state_index(state)]))[0]
+        return ACTIONS[action]
+
+    def train(self, episodes, max_steps=None, callback=None):
+        """
+        Run until `episodes` episodes have finished across all environments.
+        Episodes longer than max_steps are cut off (and still counted).
+        callback(agent, finished), if given, is called after every tick that
+        finishes an episode and may return True to stop early.
+        Returns the total reward of each finished episode, in finishing order.
+        """
+        model = self.model
+        q = self.q_table.reshape(-1)
+        n_envs = min(self.n_envs, episodes)
+        states = np.full(n_envs, model.start_state)
+        returns = np.zeros(n_envs)
+        lengths = np.zeros(n_envs, dtype=np.int64)
+        started = n_envs
+        history = []
+
+        while len(states):
+            actions = self.choose_actions(states)
+            next_states, rewards, dones = model.step(states, actions)
+            targets = rewards + self.gamma * np.where(dones, 0.0, self.greedy(next_states)[1])
+            index = states * model.n_actions + actions
+            current = q.take(index)
+            q[index] = current + self.lr * (targets - current)
+
+            returns += rewards
+            lengths += 1
+            self.steps += len(states)
+            finished = dones if max_steps is None else dones | (lengths >= max_steps)
+            if not finished.any():
+                states = next_states
+                continue
+
+            history.extend(returns[finished].tolist())
+            # Finished environments start a new episode while more are needed
+            keep = ~finished
+            restart = np.flatnonzero(finished)[:episodes - started]
+            keep[restart] = True
+            started += len(restart)
+            states = np.where(finished, model.start_state, next_states)[keep]
+            returns = np.where(finished, 0.0, returns)[keep]
+            lengths = np.where(finished, 0, lengths)[keep]
+            if callback is not None and callback(self, len(history)):
+                break
+        return history
+
+    def greedy_policy(self):
+        """(size, size) array of greedy action indices"""
+        return np.argmax(self.q_table, axis=2)
+
+    def greedy_path(self, max_steps=None):
+        """Cells visited by the greedy policy from the start (stops at the goal or after max_steps)"""
+        model = self.model
+        max_steps = max_steps or model.n_states
+        state = model.start_state
+        path = [model.start]
+        for _ in range(max_steps):
+            state = int(model.next_state[state, self.greedy_actions(np.array([state]))[0]])
+            path.append(model.state_cell(state))
+            if state == model.goal_state:
+                break
+        return path
+
+    def to_dict(self):
+        """Q-table in the notebook's {(i, j): {action: value}} format"""
+        return {(i, j): {action: float(self.q_table[i, j, a]) for a, action in enumerate(ACTIONS)}
+                for i in range(self.model.size) for j in range(self.model.size)}
+
+
+if __name__ == "__main__":
+    import time
+
+    for size, n_envs, episodes in [(7, 1024, 100000), (25, 1024, 50000), (50, 1024, 50000)]:
+        model = notebook_maze() if size == 7 else random_maze(size, seed=0)
+        agent = VectorQLearning(model, n_envs=n_envs, seed=0)
+        start = time.perf_counter()
+        history = agent.train(episodes, max_steps=20 * model.n_states)
+        elapsed = time.perf_counter() - start
+        path = agent.greedy_path()
+        print(f"{size}x{size}: {episodes} episodes on {n_envs} envs in {elapsed:.2f}s "
+              f"({episodes / elapsed:.0f} episodes/s, {agent.steps / elapsed / 1e6:.2f}M steps/s), "
+              f"greedy path {len(path) - 1} steps (shortest {model.shortest_path_length()}), "
+              f"last 100 mean reward {np.mean(history[-100:]):.1f}")
@@ -3,13 +3,16 @@
 Core game logic for Othello
 """
 
-import copy
+DIRECTIONS = [(dr, dc) for dr in [-1, 0, 1] for dc in [-1, 0, 1] if dr != 0 or dc != 0]
 
 class OthelloBoard:
     def __init__(self):
         self.size = 8
         self.board = [[' ' for _ in range(self.size)] for _ in range(self.size)]
         self.current_player = 'B'  # Black starts first
+        # Legal moves per player, {(row, col): discs to flip}, in row-major order.
+        # Filled on first use and dropped whenever the discs change.
+        self._legal_moves = {}
         self.initialize_board()
 
     def initialize_board(self):
@@ -19,6 +22,11 @@ class OthelloBoard:
         self.board[mid-1][mid] = 'B'
         self.board[mid][mid-1] = 'B'
         self.board[mid][mid] = 'W'
+        self.invalidate_moves()
+
+    def invalidate_moves(self):
+        """Forget the cached legal moves; needed after changing self.board directly"""
+        self._legal_moves = {}
 
     def is_valid_position(self, row, col):
         """Check if position is within board boundaries"""
@@ -53,52 +61,56 @@ class OthelloBoard:
 
         return []
 
+    def legal_moves(self, player):
+        """
+        The player's legal moves as {(row, col): discs to flip}, computed in
+        one board scan and cached until the next move. Do not modify it.
+        """
+        moves = self._legal_moves.get(player)
+        if moves is None:
+            moves = {}
+            board, size = self.board, self.size
+            opponent = self.get_opponent(player)
+            for row in range(size):
+                for col in range(size):
+                    if board[row][col] != ' ':
+                        continue
+                    flips = []
+                    # check_direction, inlined: this loop is the hot spot of every search
+                    for dr, dc in DIRECTIONS:
+                        r, c = row + dr, col + dc
+                        line = []
+                        while 0 <= r < size and 0 <= c < size and board[r][c] == opponent:
+                            line.append((r, c))
+                            r, c = r + dr, c + dc
+                        if line and 0 <= r < size and 0 <= c < size and board[r][c] == player:
+                            flips.extend(line)
+                    if flips:
+                        moves[(row, col)] = flips
+            self._legal_moves[player] = moves
+        return moves
+
     def is_valid_move(self, row, col, player):
         """Check if a move is valid for the given player"""
-        # Cell must be empty
-        if self.board[row][col] != ' ':
-            return False
-
-        # Check all 8 directions
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0:
-                    continue
-                if self.check_direction(row, col, dr, dc, player):
-                    return True
-
-        return False
+        return (row, col) in self.legal_moves(player)
 
     def get_valid_moves(self, player):
         """Get all valid moves for the given player"""
-        valid_moves = []
-
-        for row in range(self.size):
-            for col in range(self.size):
-                if self.is_valid_move(row, col, player):
-                    valid_moves.append((row, col))
-
-        return valid_moves
+        # A new list every time: callers such as MinimaxAI shuffle it
+        return list(self.legal_moves(player))
 
     def make_move(self, row, col, player):
         """Make a move and flip the appropriate discs"""
-        if not self.is_valid_move(row, col, player):
+        all_flips = self.legal_moves(player).get((row, col))
+        if all_flips is None:
             return False
 
-        all_flips = []
-        # Check all 8 directions
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0:
-                    continue
-                flips = self.check_direction(row, col, dr, dc, player)
-                all_flips.extend(flips)
-
         # Place the disc and flip all affected discs
         self.board[row][col] = player
         for r, c in all_flips:
             self.board[r][c] = player
 
+        self.invalidate_moves()
         return True
 
     def get_score(self):
@@ -109,9 +121,7 @@ class OthelloBoard:
 
     def is_game_over(self):
         """Check if the game is over"""
-        black_moves = self.get_valid_moves('B')
-        white_moves = self.get_valid_moves('W')
-        return len(black_moves) == 0 and len(white_moves) == 0
+        return not self.legal_moves('B') and not self.legal_moves('W')
 
     def is_board_full(self):
         """Check if the board is completely filled"""
@@ -133,8 +143,10 @@ class OthelloBoard:
     def copy(self):
         """Create a deep copy of the board"""
         new_board = OthelloBoard()
-        new_board.board = copy.deepcopy(self.board)
+        new_board.board = [row[:] for row in self.board]
         new_board.current_player = self.current_player
+        # Same discs, so the same legal moves (the per-player dicts are never modified)
+        new_board._legal_moves = dict(self._legal_moves)
         return new_board
 
     def display(self):
@@ -163,6 +175,6 @@ class OthelloBoard:
         print(f"\nScore: Black={score['B']}, White={score['W']}")
 
         # Show valid moves count
-        black_moves = len(self.get_valid_moves('B'))
-        white_moves = len(self.get_valid_moves('W'))
+        black_moves = len(self.legal_moves('B'))
+        white_moves = len(self.legal_moves('W'))
         print(f"Valid moves: Black={black_moves}, White={white_moves}")
@@ -337,8 +337,7 @@ class GUIGame:
 
         # Highlight valid moves
         if self.current_player == self.human_player and not self.game_over:
-            valid_moves = self.board.get_valid_moves(self.human_player)
-            for row, col in valid_moves:
+            for row, col in self.board.legal_moves(self.human_player):
                 self.buttons[row][col].config(bg='#f39c12')
 
     def update_display(self):
@@ -360,8 +359,8 @@ class GUIGame:
         self.score_label.config(text=f"Black: {score['B']}  |  White: {score['W']}")
 
         # Update valid moves count
-        black_moves = len(self.board.get_valid_moves('B'))
-        white_moves = len(self.board.get_valid_moves('W'))
+        black_moves = len(self.board.legal_moves('B'))
+        white_moves = len(self.board.legal_moves('W'))
         self.moves_label.config(text=f"Valid moves - Black: {black_moves}, White: {white_moves}")
 
         # Update turn indicator
@@ -373,7 +372,7 @@ class GUIGame:
 
             if self.current_player == self.human_player:
                 self.turn_label.config(text=f"Your Turn ({current})")
-                if len(self.board.get_valid_moves(self.human_player)) > 0:
+                if self.board.legal_moves(self.human_player):
                     self.status_label.config(text="Click a highlighted cell")
             else:
                 self.turn_label.config(text=f"AI's Turn ({current})")
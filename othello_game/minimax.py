@@ -23,8 +23,8 @@ class MinimaxAI:
         disc_score = score[player] - score[opponent]
         
         # Mobility (number of valid moves)
-        player_moves = len(board.get_valid_moves(player))
-        opponent_moves = len(board.get_valid_moves(opponent))
+        player_moves = len(board.legal_moves(player))
+        opponent_moves = len(board.legal_moves(opponent))
         mobility_score = player_moves - opponent_moves
         
         # Corner possession (corners are very valuable)
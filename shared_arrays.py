@@ -0,0 +1,50 @@
+"""
+NumPy arrays in shared memory for process pools
+
+The sweeps and searches (decision_tree/tree_sweep.py, ANN/ann_sweep.py,
+ML_Project/model_comparison.py, svm_grid.py) copy their data once into
+shared memory and hand the workers only the block names:
+
+    with shared_arrays({"X": X, "y": y}) as specs:
+        with Pool(workers, initializer=_init_worker, initargs=(specs,)) as pool:
+            ...
+
+    def _init_worker(specs):
+        _shared.update(attach(specs))
+"""
+
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Blocks attached in this process; an array is only valid while its block is open
+_attached = []
+
+
+@contextmanager
+def shared_arrays(arrays):
+    """Copy arrays into new shared memory blocks; yields the specs to attach them, frees the blocks on exit"""
+    blocks, specs = [], {}
+    try:
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            blocks.append(block)
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            specs[name] = (block.name, array.shape, array.dtype.str)
+        yield specs
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def attach(specs):
+    """Map the arrays of shared_arrays() specs (the blocks stay referenced for the process's life)"""
+    arrays = {}
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _attached.append(block)
+        arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+    return arrays
@@ -0,0 +1,246 @@
+"""
+Grid search over SVC parameters with cached kernel matrices (svm.ipynb)
+
+GridSearchCV(SVC(), param_grid, cv=5) fits one SVC per candidate and fold,
+and each fit computes its Gram matrix again, although every C value (and
+every gamma, for the linear kernel) sees the same one. grid_search() groups
+the candidates by their kernel parameters (kernel, gamma, degree, coef0).
+For every group and fold, a worker computes the fold's training and
+validation kernel blocks once. It then fits SVC(kernel='precomputed') on
+them for every remaining setting (C, class_weight, ...).
+
+- Folds are GridSearchCV's for a classifier: StratifiedKFold(cv), without
+  shuffling.
+- gamma='scale' and 'auto' are resolved on each fold's training rows, as
+  SVC resolves them.
+- X, y and the fold numbers are copied once into shared memory.
+- Kernel blocks larger than memory_limit are written, block by block of
+  rows, to .npy files and memory-mapped. With cache_dir, every block is
+  kept there under a hash of the data and the kernel parameters, and later
+  searches reuse it.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from multiprocessing import Pool
+
+import numpy as np
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from sklearn.svm import SVC
+
+from shared_arrays import attach, shared_arrays
+
+# Parameters that change the kernel matrix; the others only change the fit
+KERNEL_PARAMETERS = ("kernel", "gamma", "degree", "coef0")
+SVC_DEFAULTS = {"kernel": "rbf", "gamma": "scale", "degree": 3, "coef0": 0.0}
+BLOCK_ROWS = 2048
+
+# Arrays attached by each worker in _init_worker
+_shared = {}
+
+
+def _init_worker(specs, settings):
+    """Pool initializer: map the shared arrays"""
+    _shared.update(attach(specs))
+    _shared.update(settings)
+
+
+def resolve_gamma(gamma, X):
+    """SVC's value for gamma='scale' or 'auto' on training rows X"""
+    if gamma == "scale":
+        variance = X.var()
+        return 1.0 / (X.shape[1] * variance) if variance != 0 else 1.0
+    if gamma == "auto":
+        return 1.0 / X.shape[1]
+    return float(gamma)
+
+
+def kernel_block(X_rows, X_cols, kernel, gamma, degree, coef0, out=None):
+    """libsvm's kernel between the rows of X_rows and X_cols"""
+    out = np.matmul(X_rows, X_cols.T, out=out)
+    if kernel == "linear":
+        return out
+    if kernel == "rbf":
+        out *= -2
+        out += np.einsum("ij,ij->i", X_rows, X_rows)[:, None]
+        out += np.einsum("ij,ij->i", X_cols, X_cols)[None, :]
+        # Rounding can make the distance of a point to itself slightly negative
+        np.maximum(out, 0, out=out)
+        out *= -gamma
+        return np.exp(out, out=out)
+    out *= gamma
+    out += coef0
+    if kernel == "poly":
+        return np.power(out, degree, out=out)
+    if kernel == "sigmoid":
+        return np.tanh(out, out=out)
+    raise ValueError(f"Unsupported kernel: {kernel}")
+
+
+def _kernel_matrix(rows, cols, kernel_params, path):
+    """
+    Kernel between X[rows] and X[cols]: in memory, or computed block by
+    block into path (and memory-mapped) when it is larger than the limit.
+    An existing file at path is reused.
+    """
+    X = _shared["X"]
+    if path and os.path.exists(path):
+        return np.load(path, mmap_mode="r"), True
+    shape = (len(rows), len(cols))
+    if path is None or 8 * shape[0] * shape[1] <= _shared["memory_limit"] and not _shared["keep"]:
+        return kernel_block(X[rows], X[cols], **kernel_params), False
+
+    tmp = path[:-4] + f".{os.getpid()}.tmp.npy"
+    out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float64, shape=shape)
+    X_cols = X[cols]
+    for start in range(0, shape[0], BLOCK_ROWS):
+        block = out[start:start + BLOCK_ROWS]
+        block[...] = kernel_block(X[rows[start:start + BLOCK_ROWS]], X_cols, **kernel_params)
+    out.flush()
+    del out
+    os.replace(tmp, path)
+    return np.load(path, mmap_mode="r"), False
+
+
+def _run_group(task):
+    """Fit every setting of one kernel group on one fold; returns the validation accuracies"""
+    group, kernel_params, settings, fold = task
+    folds, y = _shared["folds"], _shared["y"]
+    train, validation = np.flatnonzero(folds != fold), np.flatnonzero(folds == fold)
+    params = dict(kernel_params)
+    params["gamma"] = resolve_gamma(params["gamma"], _shared["X"][train])
+
+    start = time.perf_counter()
+    cache_dir = _shared["cache_dir"]
+    if cache_dir:
+        key = hashlib.sha256(repr((_shared["data_key"], sorted(params.items()), fold)).encode()).hexdigest()[:16]
+        paths = [os.path.join(cache_dir, f"kernel-{key}-{part}.npy") for part in ("train", "validation")]
+    else:
+        paths = [None, None]
+    K_train, cached = _kernel_matrix(train, train, params, paths[0])
+    K_validation, _ = _kernel_matrix(validation, train, params, paths[1])
+    kernel_seconds = time.perf_counter() - start
+
+    scores = []
+    for setting in settings:
+        model = SVC(kernel="precomputed", **setting).fit(K_train, y[train])
+        scores.append(float(np.mean(model.predict(K_validation) == y[validation])))
+    return group, fold, scores, kernel_seconds, time.perf_counter() - start, cached
+
+
+def _groups(param_grid):
+    """
+    Candidates in GridSearchCV's order, and the groups sharing a kernel
+    matrix: [(kernel parameters, [(candidate index, other settings)])]
+    """
+    candidates = list(ParameterGrid(param_grid))
+    groups = {}
+    for index, candidate in enumerate(candidates):
+        kernel_params = {name: candidate.get(name, SVC_DEFAULTS[name]) for name in KERNEL_PARAMETERS}
+        # Parameters a kernel does not use do not split its group
+        if kernel_params["kernel"] == "linear":
+            kernel_params.update(gamma=1.0, degree=0, coef0=0.0)
+        elif kernel_params["kernel"] == "rbf":
+            kernel_params.update(degree=0, coef0=0.0)
+        elif kernel_params["kernel"] == "sigmoid":
+            kernel_params.update(degree=0)
+        setting = {name: value for name, value in candidate.items() if name not in KERNEL_PARAMETERS}
+        key = tuple(sorted(kernel_params.items(), key=lambda item: item[0]))
+        groups.setdefault(repr(key), (kernel_params, []))[1].append((index, setting))
+    return candidates, list(groups.values())
+
+
+def grid_search(X, y, param_grid, cv=5, workers=None, memory_limit=256 * 2 ** 20, cache_dir=None, refit=True,
+                verbose=True):
+    """
+    GridSearchCV(SVC(), param_grid, cv=cv, scoring='accuracy') with one
+    kernel matrix per (kernel parameters, fold). Returns a dict with
+    best_params, best_score, cv_results (params, mean, std and fold scores
+    per candidate, in GridSearchCV's order), best_estimator (an SVC refitted
+    on all of X), the kernel matrices computed and the timings.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.ascontiguousarray(y)
+    folds = np.empty(len(y), dtype=np.int16)
+    for fold, (_, validation) in enumerate(StratifiedKFold(cv).split(X, y)):
+        folds[validation] = fold
+
+    candidates, groups = _groups(param_grid)
+    # The expensive kernels (polynomials of unscaled data converge slowly) go first
+    order = sorted(range(len(groups)), key=lambda group: groups[group][0]["kernel"] != "poly")
+    tasks = [(group, groups[group][0], [setting for _, setting in groups[group][1]], fold)
+             for group in order for fold in range(cv)]
+
+    keep = cache_dir is not None
+    cache_dir = cache_dir or tempfile.mkdtemp(prefix="svm_kernels_")
+    os.makedirs(cache_dir, exist_ok=True)
+    settings = {"memory_limit": memory_limit, "cache_dir": cache_dir, "keep": keep,
+                "data_key": hashlib.sha256(X.tobytes() + y.tobytes() + folds.tobytes()).hexdigest()}
+
+    start = time.perf_counter()
+    fold_scores = np.empty((len(candidates), cv))
+    kernel_seconds = fit_seconds = 0.0
+    cached = 0
+    try:
+        with shared_arrays({"X": X, "y": y, "folds": folds}) as specs, \
+                Pool(workers, initializer=_init_worker, initargs=(specs, settings)) as pool:
+            for group, fold, scores, seconds, total, hit in pool.imap_unordered(_run_group, tasks):
+                for (index, _), score in zip(groups[group][1], scores):
+                    fold_scores[index, fold] = score
+                kernel_seconds += seconds
+                fit_seconds += total - seconds
+                cached += hit
+    finally:
+        if not keep:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    means = fold_scores.mean(axis=1)
+    # GridSearchCV picks the first candidate with the best mean
+    best = int(np.argmax(means))
+    result = {
+        "best_params": candidates[best], "best_score": float(means[best]),
+        "cv_results": [{"params": params, "mean": float(means[i]), "std": float(fold_scores[i].std()),
+                        "fold_scores": fold_scores[i].tolist()} for i, params in enumerate(candidates)],
+        "best_estimator": SVC(**candidates[best]).fit(X, y) if refit else None,
+        "kernel_matrices": len(tasks), "cached_matrices": cached, "fits": len(candidates) * cv,
+        "kernel_seconds": kernel_seconds, "fit_seconds": fit_seconds, "seconds": time.perf_counter() - start,
+    }
+    if verbose:
+        print(f"{len(candidates) * cv} fits on {len(tasks)} kernel matrices ({cached} from cache) "
+              f"in {result['seconds']:.2f}s; best {result['best_params']} ({result['best_score']:.2%})")
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from sklearn.datasets import load_breast_cancer, make_classification
+    from sklearn.model_selection import GridSearchCV, train_test_split
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", choices=["cancer", "complex"], default="cancer",
+                        help="the notebook's breast cancer features 4-5 or Part Four's 10000 samples")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache-dir", default=None)
+    parser.add_argument("--compare", action="store_true", help="also time GridSearchCV")
+    args = parser.parse_args()
+
+    if args.data == "cancer":
+        data = load_breast_cancer()
+        X, y = data.data[:, 4:6], data.target
+    else:
+        X, y = make_classification(n_samples=10000, n_features=2, n_redundant=0, n_informative=2,
+                                   n_clusters_per_class=1, class_sep=0.8, random_state=42)
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=0.3, random_state=42)
+    param_grid = {'C': [0.1, 1, 10, 100], 'gamma': ['scale', 'auto', 0.001, 0.01], 'kernel': ['rbf', 'poly']}
+
+    grid_search(X_train, y_train, param_grid, workers=args.workers, cache_dir=args.cache_dir)
+    if args.compare:
+        start = time.perf_counter()
+        reference = GridSearchCV(SVC(), param_grid, cv=5, scoring='accuracy', n_jobs=args.workers or -1)
+        reference.fit(X_train, y_train)
+        print(f"GridSearchCV: {time.perf_counter() - start:.2f}s; best {reference.best_params_} "
+              f"({reference.best_score_:.2%})")
@@ -0,0 +1,246 @@
+"""
+Bitboard TicTacToe engine
+
+Each side is a 9-bit mask with bit (row * 3 + col) set for every occupied
+cell, so moves and win checks are a few integer operations. The solver
+scores every reachable position once, keyed by its canonical form under
+the 8 symmetries of the board, and keeps the scores in a lookup table.
+
+Players are 1 (X) and -1 (O) and moves are (row, col), as in TicTacToe.ipynb.
+"""
+
+from typing import List, Optional, Tuple
+
+FULL = 0b111111111
+
+# Rows, columns and both diagonals
+LINES = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# WINNING[mask] is True if the cells in mask contain a complete line
+WINNING = [any(mask & line == line for line in LINES) for mask in range(1 << 9)]
+
+# The 8 symmetries of the square as (row, col) -> (row, col) maps
+_SYMMETRIES = (
+    lambda r, c: (r, c),
+    lambda r, c: (c, 2 - r),
+    lambda r, c: (2 - r, 2 - c),
+    lambda r, c: (2 - c, r),
+    lambda r, c: (r, 2 - c),
+    lambda r, c: (2 - r, c),
+    lambda r, c: (c, r),
+    lambda r, c: (2 - c, 2 - r),
+)
+
+
+def _permutation_table(symmetry):
+    """Image of every 9-bit mask under one symmetry"""
+    targets = []
+    for cell in range(9):
+        r, c = symmetry(*divmod(cell, 3))
+        targets.append(1 << (r * 3 + c))
+    table = []
+    for mask in range(1 << 9):
+        image = 0
+        for cell in range(9):
+            if mask >> cell & 1:
+                image |= targets[cell]
+        table.append(image)
+    return table
+
+
+PERMUTATIONS = [_permutation_table(symmetry) for symmetry in _SYMMETRIES]
+
+
+def winner(x_mask: int, o_mask: int) -> Optional[int]:
+    """1 or -1 for a won position, 0 for a draw, None while the game is on"""
+    if WINNING[x_mask]:
+        return 1
+    if WINNING[o_mask]:
+        return -1
+    return 0 if x_mask | o_mask == FULL else None
+
+
+def canonical(x_mask: int, o_mask: int) -> int:
+    """Smallest (x << 9 | o) key among the 8 symmetric images of a position"""
+    return min((table[x_mask] << 9) | table[o_mask] for table in PERMUTATIONS)
+
+
+class BitBoard:
+    """Drop-in replacement for the notebook's TicTacToe class"""
+
+    __slots__ = ("x_mask", "o_mask")
+
+    def __init__(self, x_mask: int = 0, o_mask: int = 0):
+        self.x_mask = x_mask
+        self.o_mask = o_mask
+
+    @classmethod
+    def from_array(cls, board) -> "BitBoard":
+        """Build from a 3x3 array of 1 / -1 / 0"""
+        x_mask = o_mask = 0
+        for i in range(3):
+            for j in range(3):
+                if board[i][j] == 1:
+                    x_mask |= 1 << (i * 3 + j)
+                elif board[i][j] == -1:
+                    o_mask |= 1 << (i * 3 + j)
+        return cls(x_mask, o_mask)
+
+    def to_array(self) -> List[List[int]]:
+        """The board as a 3x3 list of 1 / -1 / 0"""
+        return [[1 if self.x_mask >> (i * 3 + j) & 1 else -1 if self.o_mask >> (i * 3 + j) & 1 else 0
+                 for j in range(3)] for i in range(3)]
+
+    def copy(self) -> "BitBoard":
+        return BitBoard(self.x_mask, self.o_mask)
+
+    def reset(self):
+        self.x_mask = self.o_mask = 0
+
+    @property
+    def empty(self) -> int:
+        """Mask of empty cells"""
+        return FULL & ~(self.x_mask | self.o_mask)
+
+    def is_valid_move(self, x: int, y: int) -> bool:
+        return 0 <= x < 3 and 0 <= y < 3 and bool(self.empty >> (x * 3 + y) & 1)
+
+    def make_move(self, x: int, y: int, player: int) -> bool:
+        if not self.is_valid_move(x, y):
+            return False
+        if player == 1:
+            self.x_mask |= 1 << (x * 3 + y)
+        else:
+            self.o_mask |= 1 << (x * 3 + y)
+        return True
+
+    def undo_move(self, x: int, y: int):
+        bit = ~(1 << (x * 3 + y))
+        self.x_mask &= bit
+        self.o_mask &= bit
+
+    def check_winner(self) -> Optional[int]:
+        return winner(self.x_mask, self.o_mask)
+
+    def get_available_moves(self) -> List[Tuple[int, int]]:
+        empty = self.empty
+        return [divmod(cell, 3) for cell in range(9) if empty >> cell & 1]
+
+    def key(self) -> int:
+        """Canonical key of the position"""
+        return canonical(self.x_mask, self.o_mask)
+
+    def display(self):
+        symbols = {1: "X", -1: "O", 0: "."}
+        print("\n".join(" ".join(symbols[v] for v in row) for row in self.to_array()))
+        print()
+
+
+# (canonical key, player to move) -> score for the player to move. A win
+# scores 1 + the number of empty cells left when it happens, so quicker
+# wins and slower losses are preferred; a draw scores 0.
+_table = {}
+
+
+def position_value(x_mask: int, o_mask: int, player: int) -> int:
+    """Exact game value for `player`, who is to move"""
+    key = (canonical(x_mask, o_mask), player)
+    value = _table.get(key)
+    if value is not None:
+        return value
+
+    empty = FULL & ~(x_mask | o_mask)
+    result = winner(x_mask, o_mask)
+    if result is not None:
+        value = result * player * (bin(empty).count("1") + 1)
+    else:
+        value = -10
+        cells = empty
+        while cells:
+            bit = cells & -cells
+            cells ^= bit
+            if player == 1:
+                score = -position_value(x_mask | bit, o_mask, -1)
+            else:
+                score = -position_value(x_mask, o_mask | bit, 1)
+            if score > value:
+                value = score
+    _table[key] = value
+    return value
+
+
+def build_table() -> int:
+    """Solve the whole game from the empty board for either starting side; returns the table size"""
+    position_value(0, 0, 1)
+    position_value(0, 0, -1)
+    return len(_table)
+
+
+def best_move(board: BitBoard, player: int) -> Optional[Tuple[int, int]]:
+    """Optimal move for `player`, or None if the game is over"""
+    if board.check_winner() is not None:
+        return None
+    best_score, best = -10, None
+    empty = board.empty
+    for cell in range(9):
+        if not empty >> cell & 1:
+            continue
+        bit = 1 << cell
+        if player == 1:
+            score = -position_value(board.x_mask | bit, board.o_mask, -1)
+        else:
+            score = -position_value(board.x_mask, board.o_mask | bit, 1)
+        if score > best_score:
+            best_score, best = score, divmod(cell, 3)
+    return best
+
+
+def perfect_play(state, player: int) -> Optional[Tuple[int, int]]:
+    """
+    Move function with the notebook's (state, player) signature. Accepts a
+    BitBoard or anything with a 3x3 `board` array, like TicTacToe.
+    """
+    if not isinstance(state, BitBoard):
+        state = BitBoard.from_array(state.board)
+    return best_move(state, player)
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    start = time.perf_counter()
+    size = build_table()
+    print(f"Solved {size} canonical positions in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # Perfect play never loses: against itself and against a random player
+    results = {1: 0, -1: 0, 0: 0}
+    start = time.perf_counter()
+    games = 10000
+    for game in range(games):
+        board = BitBoard()
+        perfect_side = 1 if game % 2 == 0 else -1
+        player = 1
+        while board.check_winner() is None:
+            if player == perfect_side:
+                move = best_move(board, player)
+            else:
+                move = random.choice(board.get_available_moves())
+            board.make_move(*move, player)
+            player = -player
+        results[board.check_winner() * perfect_side] += 1
+    elapsed = time.perf_counter() - start
+    print(f"{games} games vs random: {results[1]} wins, {results[0]} draws, {results[-1]} losses "
+          f"({elapsed / games * 1e6:.0f} us per game)")
+
+    board = BitBoard()
+    player = 1
+    while board.check_winner() is None:
+        board.make_move(*best_move(board, player), player)
+        player = -player
+    print("Self-play result:", board.check_winner())
+    board.display()
@@ -0,0 +1,222 @@
+"""
+Monte Carlo Tree Search for TicTacToe on the bitboard engine
+
+Nodes live in a preallocated pool of parallel lists (struct of arrays) and
+store the side to move, so neither selection nor rollouts copy a board:
+rollouts play random moves on two local integers. The search runs for a
+number of simulations or a time budget, and the tree is kept between moves
+so the subtree under the moves actually played is reused.
+"""
+
+import math
+import random
+import time
+from typing import Optional, Tuple
+
+from tictactoe_engine import FULL, WINNING, BitBoard, winner
+
+# _BITS[mask] is the tuple of single-bit masks set in mask
+_BITS = [tuple(1 << cell for cell in range(9) if mask >> cell & 1) for mask in range(1 << 9)]
+
+
+class MCTS:
+    """
+    UCT search with a reusable node pool. Calling the object with
+    (state, player) returns a (row, col) move, like the notebook's
+    monte_carlo_tree_search.
+    """
+
+    def __init__(self, simulations=1000, time_limit=None, exploration=math.sqrt(2),
+                 capacity=100000, seed=None, name="mcts"):
+        self.simulations = simulations
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.capacity = capacity
+        self.rng = random.Random(seed)
+        self.__name__ = name
+
+        # Node pool, one entry per node in each list
+        self.x_mask = [0] * capacity
+        self.o_mask = [0] * capacity
+        self.to_move = [0] * capacity
+        self.move = [0] * capacity
+        self.parent = [-1] * capacity
+        self.untried = [0] * capacity
+        self.children = [None] * capacity
+        self.wins = [0.0] * capacity
+        self.visits = [0] * capacity
+        self.result = [None] * capacity
+        self.count = 0
+        self.root = -1
+
+        # Statistics of the last search
+        self.last_simulations = 0
+        self.last_time = 0.0
+
+    def reset(self):
+        """Forget the tree (the pool itself is kept)"""
+        self.count = 0
+        self.root = -1
+
+    def _new_node(self, x_mask, o_mask, to_move, move, parent):
+        node = self.count
+        self.count += 1
+        self.x_mask[node] = x_mask
+        self.o_mask[node] = o_mask
+        self.to_move[node] = to_move
+        self.move[node] = move
+        self.parent[node] = parent
+        self.children[node] = []
+        self.wins[node] = 0.0
+        self.visits[node] = 0
+        result = winner(x_mask, o_mask)
+        self.result[node] = result
+        self.untried[node] = FULL & ~(x_mask | o_mask) if result is None else 0
+        return node
+
+    def _find_root(self, x_mask, o_mask, player):
+        """Reuse a node for the position from the last search, or start a new tree"""
+        if self.root >= 0 and self.count < self.capacity // 2:
+            # The position is usually the old root's grandchild (our move, their reply)
+            frontier = [self.root]
+            for _ in range(3):
+                for node in frontier:
+                    if (self.x_mask[node] == x_mask and self.o_mask[node] == o_mask
+                            and self.to_move[node] == player):
+                        self.parent[node] = -1
+                        return node
+                frontier = [child for node in frontier for child in self.children[node]]
+        self.reset()
+        return self._new_node(x_mask, o_mask, player, -1, -1)
+
+    def _select(self, node):
+        """Child with the highest UCT score"""
+        wins, visits = self.wins, self.visits
+        log_visits = math.log(visits[node])
+        exploration = self.exploration
+        best, best_score = -1, -1.0
+        for child in self.children[node]:
+            n = visits[child]
+            score = wins[child] / n + exploration * math.sqrt(log_visits / n)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def _rollout(self, x_mask, o_mask, player):
+        """Random playout on local masks; returns the winner (1, -1) or 0"""
+        choice = self.rng.choice
+        while True:
+            empty = FULL & ~(x_mask | o_mask)
+            if not empty:
+                return 0
+            bit = choice(_BITS[empty])
+            if player == 1:
+                x_mask |= bit
+                if WINNING[x_mask]:
+                    return 1
+            else:
+                o_mask |= bit
+                if WINNING[o_mask]:
+                    return -1
+            player = -player
+
+    def _simulate(self, root):
+        node = root
+        untried, children = self.untried, self.children
+
+        # Selection
+        while not untried[node] and children[node]:
+            node = self._select(node)
+
+        # Expansion (skipped when the pool is full)
+        if untried[node] and self.count < self.capacity:
+            bit = self.rng.choice(_BITS[untried[node]])
+            untried[node] ^= bit
+            x_mask, o_mask, player = self.x_mask[node], self.o_mask[node], self.to_move[node]
+            if player == 1:
+                x_mask |= bit
+            else:
+                o_mask |= bit
+            child = self._new_node(x_mask, o_mask, -player, bit.bit_length() - 1, node)
+            children[node].append(child)
+            node = child
+
+        # Simulation
+        outcome = self.result[node]
+        if outcome is None:
+            outcome = self._rollout(self.x_mask[node], self.o_mask[node], self.to_move[node])
+
+        # Backpropagation: a node's wins count for the side that moved into it
+        while node >= 0:
+            self.visits[node] += 1
+            if outcome == 0:
+                self.wins[node] += 0.5
+            elif outcome == -self.to_move[node]:
+                self.wins[node] += 1.0
+            if node == root:
+                break
+            node = self.parent[node]
+
+    def search(self, x_mask, o_mask, player) -> Optional[int]:
+        """Best cell index for `player` to move, or None if the game is over"""
+        if winner(x_mask, o_mask) is not None:
+            return None
+        root = self._find_root(x_mask, o_mask, player)
+        self.root = root
+
+        start = time.perf_counter()
+        deadline = start + self.time_limit if self.time_limit is not None else None
+        simulations = 0
+        while self.simulations is None or simulations < self.simulations:
+            self._simulate(root)
+            simulations += 1
+            # Checking the clock every simulation would cost more than the simulation
+            if deadline is not None and simulations % 64 == 0 and time.perf_counter() >= deadline:
+                break
+        self.last_simulations = simulations
+        self.last_time = time.perf_counter() - start
+
+        if not self.children[root]:
+            # Pool exhausted before the root was expanded: any legal move
+            return self.rng.choice(_BITS[FULL & ~(x_mask | o_mask)]).bit_length() - 1
+        best = max(self.children[root], key=self.visits.__getitem__)
+        return self.move[best]
+
+    def __call__(self, state, player) -> Optional[Tuple[int, int]]:
+        if not isinstance(state, BitBoard):
+            state = BitBoard.from_array(state.board)
+        cell = self.search(state.x_mask, state.o_mask, player)
+        return None if cell is None else divmod(cell, 3)
+
+
+if __name__ == "__main__":
+    from tictactoe_engine import perfect_play
+
+    mcts = MCTS(simulations=1000, seed=0)
+    start = time.perf_counter()
+    mcts.reset()
+    mcts(BitBoard(), 1)
+    elapsed = time.perf_counter() - start
+    print(f"{mcts.last_simulations} simulations from the empty board in {elapsed * 1000:.1f} ms "
+          f"({mcts.last_simulations / elapsed:.0f} per second)")
+
+    for opponent_name in ("random", "perfect_play"):
+        results = {1: 0, 0: 0, -1: 0}
+        start = time.perf_counter()
+        for game in range(100):
+            board = BitBoard()
+            mcts.reset()
+            mcts_side = 1 if game % 2 == 0 else -1
+            player = 1
+            while board.check_winner() is None:
+                if player == mcts_side:
+                    move = mcts(board, player)
+                elif opponent_name == "random":
+                    move = random.choice(board.get_available_moves())
+                else:
+                    move = perfect_play(board, player)
+                board.make_move(*move, player)
+                player = -player
+            results[board.check_winner() * mcts_side] += 1
+        print(f"vs {opponent_name}: {results[1]} wins, {results[0]} draws, {results[-1]} losses "
+              f"({time.perf_counter() - start:.1f}s for 100 games)")
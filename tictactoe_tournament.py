@@ -0,0 +1,342 @@
+"""
+Parallel TicTacToe tournament
+
+Plays every pairing of the notebook's algorithms (minimax, alpha_beta,
+evaluation, mcts), in both seat orders, across a process pool. The agents
+are bitboard ports of the TicTacToe.ipynb methods that also count the
+nodes they search. Ties between equally good moves are broken with a
+seeded RNG, so repeated games sample different lines and every run with
+the same seed gives the same results.
+
+    python tictactoe_tournament.py --games 100 --out tournament
+
+writes tournament.csv (one row per algorithm and seat of each pairing) and
+tournament.npz (per-move latency histograms and raw node counts).
+"""
+
+import argparse
+import csv
+import multiprocessing
+import os
+import random
+import time
+from itertools import combinations
+
+import numpy as np
+
+from tictactoe_engine import FULL, LINES, WINNING, BitBoard, best_move, build_table
+from tictactoe_mcts import MCTS
+
+# Popcount of every 9-bit mask, and the single-bit masks it contains
+_POPCOUNT = [bin(mask).count("1") for mask in range(1 << 9)]
+_BITS = [tuple(1 << cell for cell in range(9) if mask >> cell & 1) for mask in range(1 << 9)]
+
+# Latency histogram bins: log-spaced from 1 microsecond to 100 seconds
+LATENCY_BINS = np.logspace(-6, 2, 81)
+
+
+def _empty_cells(x_mask, o_mask):
+    empty = FULL & ~(x_mask | o_mask)
+    return [cell for cell in range(9) if empty >> cell & 1]
+
+
+def _sides(board, player):
+    """(mask of `player`, mask of the opponent)"""
+    return (board.x_mask, board.o_mask) if player == 1 else (board.o_mask, board.x_mask)
+
+
+class Agent:
+    """A move function that counts the nodes it searches"""
+
+    name = "agent"
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.nodes = 0
+
+    def reset(self):
+        """Called at the start of every game"""
+
+    def choose(self, board, player):
+        """Return (row, col); self.nodes holds the nodes searched for it"""
+        raise NotImplementedError
+
+    def _pick(self, scored):
+        """Random move among the best (score, cell) pairs"""
+        best_score = max(score for score, _ in scored)
+        return divmod(self.rng.choice([cell for score, cell in scored if score == best_score]), 3)
+
+
+# The searches below work on (mask to move, mask that just moved): only the
+# side that just moved can have completed a line.
+
+def _minimax_score(mine, theirs, counter):
+    counter[0] += 1
+    if WINNING[theirs]:
+        return -1
+    empty = FULL & ~(mine | theirs)
+    if not empty:
+        return 0
+    best = -1
+    for bit in _BITS[empty]:
+        score = -_minimax_score(theirs, mine | bit, counter)
+        if score > best:
+            best = score
+    return best
+
+
+def _alpha_beta_score(mine, theirs, alpha, beta, counter):
+    counter[0] += 1
+    if WINNING[theirs]:
+        return -1
+    empty = FULL & ~(mine | theirs)
+    if not empty:
+        return 0
+    value = -2
+    for bit in _BITS[empty]:
+        score = -_alpha_beta_score(theirs, mine | bit, -beta, -alpha, counter)
+        if score > value:
+            value = score
+            if value > alpha:
+                alpha = value
+                if alpha >= beta:
+                    break
+    return value
+
+
+class MinimaxAgent(Agent):
+    """Full game-tree search, as the notebook's minimax"""
+
+    name = "minimax"
+
+    def choose(self, board, player):
+        mine, theirs = _sides(board, player)
+        counter = [0]
+        scored = [(-_minimax_score(theirs, mine | 1 << cell, counter), cell)
+                  for cell in _empty_cells(mine, theirs)]
+        self.nodes = counter[0]
+        return self._pick(scored)
+
+
+class AlphaBetaAgent(Agent):
+    """Minimax with alpha-beta pruning, as the notebook's alpha_beta"""
+
+    name = "alpha_beta"
+
+    def choose(self, board, player):
+        mine, theirs = _sides(board, player)
+        cells = _empty_cells(mine, theirs)
+        # Pruning only proves the first of several equally good moves, so
+        # shuffle the root moves to vary which one that is
+        self.rng.shuffle(cells)
+        counter = [0]
+        best_score, best, alpha = -2, None, -2
+        for cell in cells:
+            score = -_alpha_beta_score(theirs, mine | 1 << cell, -2, -alpha, counter)
+            if score > best_score:
+                best_score, best = score, cell
+            alpha = max(alpha, best_score)
+        self.nodes = counter[0]
+        return divmod(best, 3)
+
+
+class EvaluationAgent(Agent):
+    """One-ply search over the notebook's two-in-a-line evaluation"""
+
+    name = "evaluation"
+
+    def choose(self, board, player):
+        self.nodes = 0
+        scored = []
+        for cell in _empty_cells(board.x_mask, board.o_mask):
+            mine, theirs = _sides(board, player)
+            mine |= 1 << cell
+            empty = FULL & ~(mine | theirs)
+            score = 0
+            for line in LINES:
+                if _POPCOUNT[line & empty] == 1:
+                    if _POPCOUNT[line & mine] == 2:
+                        score += 1
+                    elif _POPCOUNT[line & theirs] == 2:
+                        score -= 1
+            self.nodes += 1
+            scored.append((score, cell))
+        return self._pick(scored)
+
+
+class MCTSAgent(Agent):
+    """Pooled MCTS from tictactoe_mcts; nodes are simulations"""
+
+    name = "mcts"
+
+    def __init__(self, seed=None, simulations=1000):
+        super().__init__(seed)
+        self.mcts = MCTS(simulations=simulations, seed=seed)
+
+    def reset(self):
+        self.mcts.reset()
+
+    def choose(self, board, player):
+        cell = self.mcts.search(board.x_mask, board.o_mask, player)
+        self.nodes = self.mcts.last_simulations
+        return divmod(cell, 3)
+
+
+class PerfectAgent(Agent):
+    """Lookup in the solved table from tictactoe_engine"""
+
+    name = "perfect"
+
+    def choose(self, board, player):
+        self.nodes = 1
+        return best_move(board, player)
+
+
+AGENTS = {agent.name: agent for agent in (MinimaxAgent, AlphaBetaAgent, EvaluationAgent, MCTSAgent, PerfectAgent)}
+DEFAULT_ALGORITHMS = ["minimax", "alpha_beta", "evaluation", "mcts"]
+
+
+def play_game(first, second):
+    """
+    Play one game; returns the winner (1 for `first`, -1 for `second`, 0 for
+    a draw) and per-move (seat, latency in seconds, nodes) lists.
+    """
+    board = BitBoard()
+    agents = {1: first, -1: second}
+    first.reset()
+    second.reset()
+    seats, latencies, nodes = [], [], []
+    player = 1
+    while not WINNING[board.x_mask] and not WINNING[board.o_mask] and board.empty:
+        agent = agents[player]
+        start = time.perf_counter()
+        move = agent.choose(board, player)
+        latencies.append(time.perf_counter() - start)
+        nodes.append(agent.nodes)
+        seats.append(0 if player == 1 else 1)
+        board.make_move(*move, player)
+        player = -player
+    return board.check_winner(), seats, latencies, nodes
+
+
+def _play_batch(task):
+    """Worker: play a batch of games for one pairing"""
+    first_name, second_name, batch, seed, games = task
+    build_table()
+    first = AGENTS[first_name](seed=seed * 2)
+    second = AGENTS[second_name](seed=seed * 2 + 1)
+    winners, seats, latencies, nodes = [], [], [], []
+    for _ in range(games):
+        result, game_seats, game_latencies, game_nodes = play_game(first, second)
+        winners.append(result)
+        seats.extend(game_seats)
+        latencies.extend(game_latencies)
+        nodes.extend(game_nodes)
+    return (first_name, second_name, batch, np.array(winners, dtype=np.int8), np.array(seats, dtype=np.int8),
+            np.array(latencies, dtype=np.float64), np.array(nodes, dtype=np.int64))
+
+
+def run_tournament(algorithms=None, games=100, workers=None, seed=0, batch_size=10):
+    """
+    Play `games` games for every ordered pairing; returns
+    {(first, second): {"winners", "seats", "latencies", "nodes"}} of arrays.
+    """
+    algorithms = algorithms or DEFAULT_ALGORITHMS
+    pairings = []
+    for a, b in combinations(algorithms, 2):
+        pairings += [(a, b), (b, a)]
+
+    tasks = []
+    for index, (first, second) in enumerate(pairings):
+        for batch, start in enumerate(range(0, games, batch_size)):
+            batch_seed = (seed * 1000 + index) * 1000 + batch
+            tasks.append((first, second, batch, batch_seed, min(batch_size, games - start)))
+
+    parts = {pairing: [] for pairing in pairings}
+    with multiprocessing.Pool(workers) as pool:
+        for first, second, batch, *arrays in pool.imap_unordered(_play_batch, tasks):
+            parts[(first, second)].append((batch, arrays))
+
+    results = {}
+    for pairing, batches in parts.items():
+        # Batches finish in any order; sort them so the output is reproducible
+        batches = [arrays for _, arrays in sorted(batches, key=lambda item: item[0])]
+        winners, seats, latencies, nodes = (np.concatenate(column) for column in zip(*batches))
+        results[pairing] = {"winners": winners, "seats": seats, "latencies": latencies, "nodes": nodes}
+    return results
+
+
+def summarize(results):
+    """One row per (pairing, seat) with win counts, latency percentiles and node counts"""
+    rows = []
+    for (first, second), data in results.items():
+        winners = data["winners"]
+        for seat, (algorithm, opponent, sign) in enumerate([(first, second, 1), (second, first, -1)]):
+            moves = data["seats"] == seat
+            latencies = data["latencies"][moves] * 1000
+            nodes = data["nodes"][moves]
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0.0, 0.0, 0.0)
+            rows.append({
+                "algorithm": algorithm,
+                "opponent": opponent,
+                "seat": "first" if seat == 0 else "second",
+                "games": len(winners),
+                "wins": int((winners == sign).sum()),
+                "draws": int((winners == 0).sum()),
+                "losses": int((winners == -sign).sum()),
+                "moves": int(moves.sum()),
+                "mean_ms": round(float(latencies.mean()), 4) if len(latencies) else 0.0,
+                "p50_ms": round(float(p50), 4),
+                "p95_ms": round(float(p95), 4),
+                "p99_ms": round(float(p99), 4),
+                "mean_nodes": round(float(nodes.mean()), 1) if len(nodes) else 0.0,
+                "max_nodes": int(nodes.max()) if len(nodes) else 0,
+            })
+    return rows
+
+
+def write_results(results, out_prefix):
+    """Write <prefix>.csv (summary rows) and <prefix>.npz (histograms and node counts)"""
+    rows = summarize(results)
+    with open(out_prefix + ".csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    arrays = {"latency_bins": LATENCY_BINS}
+    for (first, second), data in results.items():
+        for seat, algorithm in enumerate((first, second)):
+            moves = data["seats"] == seat
+            key = f"{first}_vs_{second}__{algorithm}"
+            arrays[key + "__latency_hist"] = np.histogram(data["latencies"][moves], bins=LATENCY_BINS)[0]
+            arrays[key + "__nodes"] = data["nodes"][moves]
+        arrays[f"{first}_vs_{second}__winners"] = data["winners"]
+    np.savez_compressed(out_prefix + ".npz", **arrays)
+    return rows
+
+
+def print_summary(rows):
+    print(f"{'algorithm':>10} {'opponent':>10} {'seat':>6} {'W':>4} {'D':>4} {'L':>4} "
+          f"{'mean ms':>9} {'p95 ms':>9} {'mean nodes':>11}")
+    for row in rows:
+        print(f"{row['algorithm']:>10} {row['opponent']:>10} {row['seat']:>6} {row['wins']:>4} "
+              f"{row['draws']:>4} {row['losses']:>4} {row['mean_ms']:>9.3f} {row['p95_ms']:>9.3f} "
+              f"{row['mean_nodes']:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play a TicTacToe tournament between search algorithms")
+    parser.add_argument("--algorithms", nargs="+", default=DEFAULT_ALGORITHMS, choices=sorted(AGENTS))
+    parser.add_argument("--games", type=int, default=100, help="games per ordered pairing")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="tournament", help="output prefix for .csv and .npz")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run_tournament(args.algorithms, args.games, args.workers, args.seed)
+    rows = write_results(results, args.out)
+    print(f"{len(results)} pairings x {args.games} games in {time.perf_counter() - start:.1f}s "
+          f"on {args.workers or os.cpu_count()} processes")
+    print_summary(rows)
+    print(f"Results written to {args.out}.csv and {args.out}.npz")